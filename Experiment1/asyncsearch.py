@@ -0,0 +1,185 @@
+"""Search API for asyncio applications.
+
+A long `Astar` call blocks the event loop. Here A* runs in slices: `astar_slices`
+is a generator that expands `slice_size` nodes, yields a `Progress` event and
+waits to be resumed. The slices are run either
+
+- on the event loop itself, between two other tasks (`solve_async`), or
+- on the threads of a `SearchPool`, shared by all the requests: every slice is a
+  separate job of the pool, so concurrent searches take turns instead of the
+  first one holding a worker until it is over.
+
+Either way a search can be cancelled or timed out between two slices, and the
+progress events can be followed by a callback.
+
+Examples
+----------
+>>> async with SearchPool(max_workers=4) as pool:
+...     path = await pool.solve(root, timeout=10, on_progress=print)
+
+"""
+import asyncio
+import inspect
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from search import _astar_slices
+
+Progress = namedtuple('Progress', ['expanded', 'generated', 'f_bound', 'open_size'])
+Progress.__doc__ = """An event of a search in slices: the number of expanded and generated nodes
+so far, the f value of the last expanded node and the size of the open list."""
+
+
+def astar_slices(root, slice_size=1000, state_set=set, stats=None):
+    """Runs the A* algorithm of `search.Astar` as a generator, one slice at a time.
+
+    It is the loop of `Astar` itself, paused after every slice.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    slice_size: int, optional
+        The number of expansions between two events. Default is 1000.
+
+    state_set: callable, optional
+        The factory of the sets of open and closed states, as in `Astar`. Default is `set`.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search, as in `Astar`. Every slice runs
+        inside `stats.measure`, so `elapsed` adds up the time of the slices, not the time spent
+        waiting between them. Default is None.
+
+    Yields
+    -------
+        progress: Progress
+            The state of the search after every slice.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, as the value of the StopIteration, like the result of `Astar`.
+    """
+    slices = _astar_slices(root, state_set, stats, slice_size)
+    while True:
+        try:
+            if stats is None:
+                progress = next(slices)
+            else:
+                with stats.measure(type(root)):
+                    progress = next(slices)
+        except StopIteration as stop:
+            return stop.value
+        yield Progress(*progress)
+
+
+async def solve_async(root, timeout=None, on_progress=None, slice_size=1000, stats=None):
+    """Runs A* on the event loop, giving control back to the other tasks after every slice.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    timeout: float, optional
+        The time limit in seconds. Default is None, no limit.
+
+    on_progress: callable, optional
+        Called as on_progress(progress) after every slice; it may be a coroutine function. Default is None.
+
+    slice_size: int, optional
+        The number of expansions of a slice. Default is 1000.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters and the time of this search, see `astar_slices`.
+        Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, like the result of `Astar`.
+
+    Raises
+    ------
+        asyncio.TimeoutError
+            If the search takes longer than `timeout`.
+    """
+    async def run():
+        slices = astar_slices(root, slice_size, stats=stats)
+        try:
+            while True:
+                try:
+                    progress = next(slices)
+                except StopIteration as stop:
+                    return stop.value
+                await _notify(on_progress, progress)
+                await asyncio.sleep(0)
+        finally:
+            slices.close()
+    return await asyncio.wait_for(run(), timeout)
+
+
+class SearchPool:
+    """A bounded pool of threads that runs the slices of many searches in turn.
+
+    Parameters
+    ----------
+    max_workers: int, optional
+        The number of threads. Default is the default of `ThreadPoolExecutor`.
+
+    slice_size: int, optional
+        The number of expansions of a slice. Default is 1000.
+    """
+    def __init__(self, max_workers=None, slice_size=1000):
+        self.slice_size = slice_size
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search')
+
+    async def solve(self, root, timeout=None, on_progress=None, stats=None):
+        """Runs A* on the pool, with the same parameters and result as `solve_async`.
+
+        A cancelled or timed out search stops at the end of the slice it is running.
+        """
+        return await asyncio.wait_for(self._run(root, on_progress, stats), timeout)
+
+    async def _run(self, root, on_progress, stats):
+        slices = astar_slices(root, self.slice_size, stats=stats)
+        job = None
+        try:
+            while True:
+                job = self.executor.submit(_advance, slices)
+                done, value = await asyncio.wrap_future(job)
+                if done:
+                    return value
+                await _notify(on_progress, value)
+        finally:
+            if job is None:
+                slices.close()
+            else: # 正在运行的一片结束之后再关闭生成器
+                job.add_done_callback(lambda _: slices.close())
+
+    def close(self):
+        """Stops the threads once the slices already submitted are over."""
+        self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+def _advance(slices):
+    """Runs one slice. Returns (True, path) when the search is over, (False, progress) otherwise."""
+    try:
+        return False, next(slices)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+async def _notify(on_progress, progress):
+    """Calls the progress callback, awaiting it if it is a coroutine function."""
+    if on_progress is not None:
+        result = on_progress(progress)
+        if inspect.isawaitable(result):
+            await result
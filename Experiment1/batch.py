@@ -0,0 +1,203 @@
+"""Batch solving of many problem instances over a process pool.
+
+Instances are read as JSON lines, one object per line:
+
+    {"id": "a", "problem": "fifteens", "board": "1 2 3 4\\n5 6 7 8\\n9 10 0 11\\n13 14 15 12"}
+    {"id": "b", "problem": "superqueens", "n": 7}
+
+The board of a 15 puzzle may also be given as a flat list of 16 numbers. The
+results are written as JSON lines too, one per instance, in the order the
+instances finish:
+
+    {"id": "a", "problem": "fifteens", "solved": true, "length": 2, "moves": ["R", "D"],
+     "cost": 2, "time": 0.0004, "expanded": 2, "generated": 7, "duplicates": 1, ...}
+
+Usage:
+
+    python batch.py instances.jsonl --engine idastar --processes 8 > results.jsonl
+    python batch.py instances.jsonl --cache solutions.sqlite
+    cat instances.jsonl | python batch.py
+
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+from problems import FifteensNode, SuperqueensNode
+from search import ENGINES
+from solver import SolutionCache, solve
+from stats import SearchStats
+
+_caches = {} # 每个进程打开一次的解缓存: 文件路径 -> SolutionCache
+
+
+def make_root(instance):
+    """Builds the root node of an instance.
+
+    Parameters
+    ----------
+    instance : dict
+        The instance, with the key 'problem' ('fifteens' or 'superqueens') and either
+        'board' (a string or a flat list of 16 numbers) or 'n'.
+
+    Returns
+    -------
+        root : Node
+            The start node of the instance.
+
+    Raises
+    ------
+    ValueError
+        If the instance describes an unknown problem.
+    """
+    problem = instance.get('problem', 'fifteens')
+    if problem == 'fifteens':
+        board = instance['board']
+        if not isinstance(board, str):
+            board = '\n'.join(' '.join(str(n) for n in board[i:i + 4]) for i in range(0, 16, 4))
+        return FifteensNode(input_str=board)
+    if problem == 'superqueens':
+        return SuperqueensNode(n=int(instance['n']))
+    raise ValueError('unknown problem: {!r}'.format(problem))
+
+
+def solve_instance(instance, engine='astar', cache=None):
+    """Solves one instance and summarizes the solution.
+
+    15 puzzles go through `solver.solve`: unsolvable boards are rejected at once
+    and solved boards are answered from the cache, if one is given.
+
+    Parameters
+    ----------
+    instance : dict
+        The instance, see `make_root`.
+
+    engine : str, optional
+        The name of the search algorithm in `search.ENGINES`. Default is 'astar'.
+
+    cache : str, optional
+        The sqlite file of the `SolutionCache`. Default is None (no cache).
+
+    Returns
+    -------
+        result : dict
+            The id and problem of the instance, whether it was solved, the number of moves
+            ('length'), the moves themselves, the cost of the solution, the counters of the
+            search and the wall time in seconds. If the instance could not be read or its
+            search raised any exception (e.g. MemoryError), the result holds an 'error'
+            message instead, as does an instance that already has one (a line that
+            `read_instances` could not parse), so one instance never stops a batch.
+    """
+    if not isinstance(instance, dict):
+        return {'id': None, 'problem': None, 'error': _not_an_object(instance)}
+    result = {'id': instance.get('id'), 'problem': instance.get('problem', 'fifteens')}
+    if 'error' in instance:
+        result['error'] = instance['error']
+        return result
+    if cache is not None and cache not in _caches:
+        _caches[cache] = SolutionCache(cache)
+    stats = SearchStats()
+    start = time.perf_counter()
+    try:
+        root = make_root(instance)
+        path = solve(root, ENGINES[engine], cache=_caches.get(cache), stats=stats)
+    except Exception as e: # 包括搜索中的 MemoryError, RecursionError 等
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+        return result
+    result['time'] = time.perf_counter() - start
+    result['solved'] = bool(path)
+    if path:
+        result['length'] = len(path) - 1
+        result['moves'] = [node.get_move() for node in path[1:]]
+        result['cost'] = path[-1].g
+    result.update(stats.as_dict())
+    return result
+
+
+def _solve(args):
+    return solve_instance(*args)
+
+
+def solve_batch(instances, engine='astar', processes=None, cache=None):
+    """Solves many instances over a pool of worker processes.
+
+    The workers are started once and take one instance at a time, so a slow
+    instance does not hold back the results of the others.
+
+    Parameters
+    ----------
+    instances : iterable of dict
+        The instances, see `make_root`. Instances without an 'id' get their position as id;
+        values that are not dicts get an error result.
+
+    engine : str, optional
+        The name of the search algorithm in `search.ENGINES`. Default is 'astar'.
+
+    processes : int, optional
+        The number of worker processes. Default is the number of CPUs.
+
+    cache : str, optional
+        The sqlite file of the `SolutionCache` shared by the workers. Default is None (no cache).
+
+    Returns
+    -------
+        results : generator of dict
+            The result of every instance (see `solve_instance`), as soon as it is finished.
+    """
+    if engine not in ENGINES:
+        raise ValueError('unknown engine: {!r}'.format(engine))
+    tasks = ((dict(instance, id=instance.get('id', i)) if isinstance(instance, dict)
+              else {'id': i, 'error': _not_an_object(instance)}, engine, cache)
+             for i, instance in enumerate(instances))
+    with multiprocessing.Pool(processes) as pool:
+        for result in pool.imap_unordered(_solve, tasks):
+            yield result
+
+
+def read_instances(lines):
+    """Parses JSON lines into instances, skipping blank lines.
+
+    A line that is not valid JSON gives an instance with only an 'error' message, so that
+    it gets an error result like the other invalid instances instead of stopping the batch.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield {'error': 'line {}: {}: {}'.format(number, type(e).__name__, e)}
+
+
+def _not_an_object(value):
+    """Returns the error message of an instance that is not a JSON object."""
+    return 'TypeError: an instance must be a JSON object, got {}'.format(type(value).__name__)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve many puzzle instances and stream the results as JSON lines.')
+    parser.add_argument('input', nargs='?', default='-', help='the file of instances, one JSON object per line (default: stdin)')
+    parser.add_argument('-o', '--output', default='-', help='the file to write the results to (default: stdout)')
+    parser.add_argument('-e', '--engine', default='astar', choices=sorted(ENGINES), help='the search algorithm')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='the number of worker processes (default: number of CPUs)')
+    parser.add_argument('-c', '--cache', default=None, help='the sqlite file caching the solutions of 15 puzzles')
+    args = parser.parse_args(argv)
+
+    infile = sys.stdin if args.input == '-' else open(args.input)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for result in solve_batch(read_instances(infile), args.engine, args.processes, args.cache):
+            outfile.write(json.dumps(result) + '\n')
+            outfile.flush()
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""Reproducible benchmarks of the search engines.
+
+The 15 puzzle instances are made by random walks from the goal, seeded by the
+suite seed, the walk length and the index of the instance, so the same command
+always builds the same boards. The walks never come back to a board they have
+visited, so the length of the walk is an upper bound of the solution depth
+(the actual depth of every instance is recorded with its results). Superqueens
+instances are a sweep over the board size n.
+
+Every run of an engine and heuristic on an instance takes place in a fresh
+process, started with the 'spawn' method, and its peak resident memory is its
+own (see `stats._peak_rss`): a forked process would count the memory of the
+parent too, which hides the memory of small runs. The results are written as
+JSON:
+
+    {"seed": 0, "python": "3.11.4", "machine": "x86_64", "results": [
+        {"id": "fifteens-30-0", "config": "astar/manhattan-lc", "solved": true, "length": 28,
+         "expanded": 1402, "expansions_per_second": 25310.2, "peak_memory": 21504000,
+         "elapsed": 0.0554, ...}, ...]}
+
+Usage:
+
+    python benchmark.py run -o baseline.json --depths 20 30 40 --count 5 --queens 6 7 8
+    python benchmark.py run -o current.json --depths 20 30 40 --count 5 --queens 6 7 8
+    python benchmark.py compare baseline.json current.json --threshold 0.2
+
+`compare` prints the regressions and exits with status 1 if there are any.
+
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import sys
+
+import search
+from external import ExternalAstar
+from patterndb import PatternDatabase, PatternDatabaseNode
+from problems import FifteensNode, SuperqueensNode, tile_tables
+from stats import SearchStats
+from vectorized import BatchAstar
+
+ENGINES = dict(search.ENGINES, batch=BatchAstar, external=ExternalAstar)
+SLIDING_TILE_ENGINES = {'batch', 'external'} # 只能解滑块谜题的搜索算法, 自己计算 Manhattan + LC 启发函数
+HEURISTICS = {'manhattan-lc': FifteensNode, 'pdb': PatternDatabaseNode} # 15 谜题的启发函数 -> 节点类
+METRICS = {'expanded': 1, 'elapsed': 1, 'peak_memory': 1, 'expansions_per_second': -1} # 指标 -> 变大(1)或变小(-1)为退步
+TIMED_METRICS = {'elapsed', 'expansions_per_second'}
+MIN_ELAPSED = 0.05 # 比这更短的运行, 时间指标受噪声影响太大, 不比较
+
+
+def random_walk(depth, rng):
+    """Returns the board reached from the goal of the 15 puzzle by a random walk of `depth` moves
+    that never visits a board twice (when it is stuck, it stops early)."""
+    tables = tile_tables(16)
+    board = list(tables.goal)
+    blank = 15
+    seen = {tuple(board)}
+    for _ in range(depth):
+        targets = []
+        for target in tables.moves[blank]:
+            board[blank], board[target] = board[target], 0
+            if tuple(board) not in seen:
+                targets.append(target)
+            board[target], board[blank] = board[blank], 0
+        if not targets:
+            break
+        target = rng.choice(targets)
+        board[blank], board[target] = board[target], 0
+        blank = target
+        seen.add(tuple(board))
+    return board
+
+
+def fifteens_instances(depths, count, seed=0):
+    """Returns `count` 15 puzzle instances for every walk length in `depths`, as in `batch.make_root`."""
+    instances = []
+    for depth in depths:
+        for i in range(count):
+            rng = random.Random('{}-{}-{}'.format(seed, depth, i))
+            instances.append({'id': 'fifteens-{}-{}'.format(depth, i), 'problem': 'fifteens',
+                              'board': random_walk(depth, rng), 'walk': depth})
+    return instances
+
+
+def superqueens_instances(ns):
+    """Returns one Superqueens instance for every board size in `ns`."""
+    return [{'id': 'superqueens-{}'.format(n), 'problem': 'superqueens', 'n': n} for n in ns]
+
+
+def make_root(instance, heuristic='manhattan-lc', pdb_directory=None):
+    """Builds the root node of an instance, with the node class of the heuristic for 15 puzzles."""
+    if instance['problem'] == 'superqueens':
+        return SuperqueensNode(n=instance['n'])
+    node_class = HEURISTICS[heuristic]
+    if node_class is PatternDatabaseNode and PatternDatabaseNode.database is None:
+        PatternDatabaseNode.database = PatternDatabase(pdb_directory)
+    return node_class(board=instance['board'])
+
+
+def run_one(instance, engine, heuristic='manhattan-lc', pdb_directory=None):
+    """Runs one engine on one instance in this process and returns its result.
+    The heuristic of Superqueens instances is called 'zero'.
+
+    Returns
+    -------
+        result : dict
+            The id of the instance, the configuration ('engine/heuristic'), whether it was
+            solved, the solution length and the `SearchStats.as_dict` of the search.
+    """
+    result = {'id': instance['id'], 'config': '{}/{}'.format(engine, heuristic), 'engine': engine,
+              'heuristic': heuristic}
+    root = make_root(instance, heuristic, pdb_directory)
+    stats = SearchStats()
+    path = ENGINES[engine](root, stats=stats)
+    result['solved'] = bool(path)
+    result['length'] = len(path) - 1 if path else None
+    result['cost'] = path[-1].g if path else None
+    result.update(stats.as_dict())
+    return result
+
+
+def _run_one(args):
+    return run_one(*args)
+
+
+def run_suite(instances, engines, heuristics=('manhattan-lc',), pdb_directory=None, time_limit=None):
+    """Runs every engine and heuristic on every instance, one run at a time, each in a fresh spawned process.
+
+    Engines that only solve sliding tile puzzles are skipped on Superqueens instances, and
+    with the heuristics other than 'manhattan-lc', which they do not compute. Superqueens
+    instances run once per engine, without heuristic.
+
+    Parameters
+    ----------
+    instances : list of dict
+        The instances, see `fifteens_instances` and `superqueens_instances`.
+
+    engines : list of str
+        The names of the engines in `ENGINES`.
+
+    heuristics : list of str, optional
+        The names of the 15 puzzle heuristics in `HEURISTICS`. Default is ('manhattan-lc',).
+
+    pdb_directory : str, optional
+        The directory of the pattern databases, for the 'pdb' heuristic. Default is None.
+
+    time_limit : float, optional
+        The seconds a run may take before it is killed and recorded with 'error': 'timeout'.
+        Default is None, no limit.
+
+    Returns
+    -------
+        results : generator of dict
+            The result of every run, see `run_one`.
+    """
+    ctx = multiprocessing.get_context('spawn') # fork 出的进程共享父进程的内存页, 峰值内存包含父进程的部分
+    for instance in instances:
+        for engine in engines:
+            if instance['problem'] == 'superqueens':
+                if engine in SLIDING_TILE_ENGINES:
+                    continue
+                configs = ['zero']
+            elif engine in SLIDING_TILE_ENGINES:
+                configs = [h for h in heuristics if HEURISTICS[h] is FifteensNode]
+            else:
+                configs = heuristics
+            for heuristic in configs:
+                task = (instance, engine, heuristic, pdb_directory)
+                with ctx.Pool(1) as pool: # 每次运行一个新进程, 峰值内存互不影响
+                    try:
+                        result = pool.apply_async(_run_one, (task,)).get(time_limit)
+                    except multiprocessing.TimeoutError:
+                        result = {'id': instance['id'], 'config': '{}/{}'.format(engine, heuristic),
+                                  'engine': engine, 'heuristic': heuristic, 'error': 'timeout'}
+                yield result
+
+
+def compare(baseline, current, threshold=0.2):
+    """Compares the results of two suites run by the same configurations on the same instances.
+
+    A metric of `METRICS` regresses when it is worse by more than `threshold` (a fraction of the
+    baseline value); the timed metrics are skipped for runs shorter than `MIN_ELAPSED` seconds in the
+    baseline. A run regresses as well when it no longer finds a solution of the same length, or when
+    it times out.
+
+    Parameters
+    ----------
+    baseline, current : dict
+        The contents of two result files.
+
+    threshold : float, optional
+        The tolerated relative change. Default is 0.2.
+
+    Returns
+    -------
+        regressions : list of dict
+            The id and config of the run, the metric, its baseline and current values.
+    """
+    before = {(r['id'], r['config']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        key = (result['id'], result['config'])
+        base = before.get(key)
+        if base is None or 'error' in base:
+            continue
+        if 'error' in result:
+            regressions.append({'id': key[0], 'config': key[1], 'metric': 'error',
+                                'baseline': None, 'current': result['error']})
+            continue
+        for metric in ('solved', 'length'):
+            if result[metric] != base[metric]:
+                regressions.append({'id': key[0], 'config': key[1], 'metric': metric,
+                                    'baseline': base[metric], 'current': result[metric]})
+        for metric, sign in METRICS.items():
+            if metric in TIMED_METRICS and base['elapsed'] < MIN_ELAPSED:
+                continue
+            if sign * (result[metric] - base[metric]) > threshold * base[metric]:
+                regressions.append({'id': key[0], 'config': key[1], 'metric': metric,
+                                    'baseline': base[metric], 'current': result[metric]})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the search engines and compare the results with a baseline.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help='run the benchmark suite')
+    run_parser.add_argument('-o', '--output', default='-', help='the JSON file to write the results to (default: stdout)')
+    run_parser.add_argument('--seed', type=int, default=0, help='the seed of the 15 puzzle instances (default: 0)')
+    run_parser.add_argument('--depths', type=int, nargs='*', default=[20, 30, 40],
+                            help='the random walk lengths of the 15 puzzle instances (default: 20 30 40)')
+    run_parser.add_argument('--count', type=int, default=3, help='the number of instances per walk length (default: 3)')
+    run_parser.add_argument('--queens', type=int, nargs='*', default=[6, 7, 8, 9],
+                            help='the sizes of the Superqueens instances (default: 6 7 8 9)')
+    run_parser.add_argument('-e', '--engines', nargs='+', default=['astar', 'bucket', 'batch'], choices=sorted(ENGINES),
+                            help='the search algorithms (default: astar bucket batch)')
+    run_parser.add_argument('--heuristics', nargs='+', default=['manhattan-lc'], choices=sorted(HEURISTICS),
+                            help='the 15 puzzle heuristics (default: manhattan-lc)')
+    run_parser.add_argument('--pdb-directory', default=None, help='the directory of the pattern databases (see patterndb.py)')
+    run_parser.add_argument('--time-limit', type=float, default=None, help='the seconds a run may take (default: no limit)')
+    compare_parser = subparsers.add_parser('compare', help='flag the regressions of a result file against a baseline')
+    compare_parser.add_argument('baseline', help='the baseline result file')
+    compare_parser.add_argument('current', help='the result file to check')
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help='the tolerated relative change (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        for r in regressions:
+            print('{id} {config}: {metric} {baseline} -> {current}'.format(**r))
+        return 1 if regressions else 0
+
+    instances = fifteens_instances(args.depths, args.count, args.seed) + superqueens_instances(args.queens)
+    results = []
+    for result in run_suite(instances, args.engines, args.heuristics, args.pdb_directory, args.time_limit):
+        results.append(result)
+        print(result['id'], result['config'], result.get('error', result.get('elapsed')), file=sys.stderr)
+    report = {'seed': args.seed, 'python': platform.python_version(), 'machine': platform.machine(),
+              'results': results}
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=1)
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Bucketed open list for A* search.
+
+The open list keeps one bucket (a LIFO list) per distinct (f, g) pair of the
+nodes it holds. Problems such as the 15 puzzle or the Superqueens problem only
+produce a handful of distinct f and g values, so pushing a node into an existing
+bucket and popping from the front bucket are O(1); a small heap of the bucket
+keys is only touched when a bucket is created or emptied.
+
+"""
+import heapq
+
+
+class BucketQueue:
+    """Priority queue of nodes ordered by lowest f, breaking ties toward higher g.
+
+    Nodes with the same f and g are popped last-in first-out, which keeps the
+    search diving along the most recently generated (deepest) nodes.
+
+    Examples
+    ----------
+    >>> queue = BucketQueue()
+    >>> queue.push(node)
+    >>> best = queue.pop()
+    """
+    def __init__(self):
+        self._buckets = {} # (f, -g) -> 节点列表
+        self._keys = [] # 非空桶的键构成的堆
+        self._size = 0
+
+    def push(self, node):
+        """Adds a node to the bucket of its (f, g) pair."""
+        key = (node.f, -node.g)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = []
+            heapq.heappush(self._keys, key)
+        bucket.append(node)
+        self._size += 1
+
+    def pop(self):
+        """Removes and returns a node with the lowest f and, among those, the highest g.
+
+        Raises
+        ------
+        IndexError
+            If the queue is empty.
+        """
+        if not self._keys:
+            raise IndexError('pop from an empty BucketQueue')
+        key = self._keys[0]
+        bucket = self._buckets[key]
+        node = bucket.pop()
+        if not bucket:
+            del self._buckets[key]
+            heapq.heappop(self._keys)
+        self._size -= 1
+        return node
+
+    def peek_f(self):
+        """Returns the lowest f value in the queue, or None if it is empty."""
+        return self._keys[0][0] if self._keys else None
+
+    def __len__(self):
+        return self._size
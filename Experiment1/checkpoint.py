@@ -0,0 +1,230 @@
+"""A* with periodic checkpoints, resumable after the process is stopped.
+
+`CheckpointedAstar` is `PredecessorAstar` plus a checkpoint directory. The search
+only ever adds to its tables, so the checkpoint is made of two append-only logs:
+
+- pushes.log: (state, g, parent_state) for every node put in the open list,
+- closed.log: the states in the order they were closed,
+
+and a small header, checkpoint.json, with the counters of the search and the
+length of each log at the time of the checkpoint. At every checkpoint only the
+records added since the previous one are written, by a background thread, so
+the expansion loop just hands them over and goes on. The header is replaced
+atomically once the records it counts are on disk; anything written after it
+is ignored when resuming.
+
+Records are written in chunks: a 4-byte length, then the zlib-compressed pickle
+of a list of records, so a checkpoint can be resumed on another machine. To
+resume, the open list is rebuilt from the pushed states that were not closed,
+with `root.restore(state, g)`.
+
+"""
+import heapq
+import json
+import os
+import pickle
+import queue
+import struct
+import threading
+import time
+import zlib
+
+from search import _predecessor_search
+from stats import SearchStats, instrumented
+
+_VERSION = 1
+_HEADER = 'checkpoint.json'
+_PUSHES = 'pushes.log'
+_CLOSED = 'closed.log'
+_LENGTH = struct.Struct('<I')
+_COUNTERS = ('expanded', 'generated', 'duplicates')
+
+
+@instrumented
+def CheckpointedAstar(root, directory, interval=60.0, resume=True, stats=None):
+    """Runs the A* algorithm of `PredecessorAstar`, saving a checkpoint every `interval` seconds.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved. Its class must have `restore(state, g)`,
+        like `SlidingTileNode` and `SuperqueensNode`.
+
+    directory: str
+        The directory of the checkpoint. It is created if needed.
+
+    interval: float, optional
+        The seconds between two checkpoints. Default is 60.
+
+    resume: bool, optional
+        Whether to continue from the checkpoint in `directory`, if there is one. If False,
+        the checkpoint is discarded and the search starts over. Default is True.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search, including those saved
+        before it was resumed. Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node.
+            If there is no solution it returns an empty list, like `Astar`.
+
+    Raises
+    ------
+        ValueError
+            If the checkpoint in `directory` was made for another root.
+    """
+    os.makedirs(directory, exist_ok=True)
+    header = _read_header(directory) if resume else None
+    if header is not None and header['root'] != repr(root.state):
+        raise ValueError('the checkpoint in {} was made for another root'.format(directory))
+    if header is None:
+        if os.path.exists(os.path.join(directory, _HEADER)):
+            os.remove(os.path.join(directory, _HEADER))
+        header = {'version': _VERSION, 'root': repr(root.state), 'pushes': [0, 0], 'closed': [0, 0],
+                  'expanded': 0, 'generated': 0, 'duplicates': 0}
+        for name in (_PUSHES, _CLOSED):
+            open(os.path.join(directory, name), 'wb').close()
+        OPEN = [(root.f, -root.g, 0, root, None)] # 堆: (f, -g, 次序, 节点, 父状态)
+        open_g = {root.state: root.g} # open 中的状态 -> g
+        closed = {} # 状态 -> (父状态, g)
+        pushes = [(root.state, root.g, None)] # 上次检查点之后的新记录
+    else:
+        OPEN, open_g, closed = _load(root, directory, header)
+        pushes = []
+    if stats is None: # 计数器要写进检查点
+        stats = SearchStats()
+    else:
+        stats.expanded += header['expanded']
+        stats.generated += header['generated']
+        stats.duplicates += header['duplicates']
+    offsets = [header[key] - getattr(stats, key) for key in _COUNTERS]
+    closes = []
+    complete = (len(pushes), 0, [header[key] for key in _COUNTERS]) # 最后一次完整扩展之后的记录数和计数器
+    writer = _Writer(directory, header)
+    next_checkpoint = time.perf_counter() + interval
+
+    def on_close(state):
+        nonlocal pushes, closes, complete, next_checkpoint
+        counters = [getattr(stats, key) + offset for key, offset in zip(_COUNTERS, offsets)]
+        if time.perf_counter() >= next_checkpoint: # 在扩展下一个节点之前, 记录都是完整的
+            writer.submit(pushes, closes, counters)
+            pushes, closes = [], []
+            next_checkpoint = time.perf_counter() + interval
+        complete = (len(pushes), len(closes), counters)
+        closes.append(state)
+
+    try:
+        return _predecessor_search(root, OPEN, open_g, closed, stats,
+                                   on_push=lambda *record: pushes.append(record), on_close=on_close)
+    finally:
+        # 最后一个检查点: 只写到最后一次完整的扩展为止, 被打断的扩展和目标状态在恢复时重新处理
+        try:
+            writer.submit(pushes[:complete[0]], closes[:complete[1]], complete[2])
+        finally:
+            writer.close()
+
+
+def _read_header(directory):
+    """Returns the header of the checkpoint in `directory`, or None if there is none."""
+    path = os.path.join(directory, _HEADER)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        header = json.load(f)
+    if header.get('version') != _VERSION:
+        raise ValueError('unsupported checkpoint version: {!r}'.format(header.get('version')))
+    return header
+
+
+def _read_log(path, size):
+    """Yields the records of the first `size` bytes of a log."""
+    with open(path, 'rb') as f:
+        data = f.read(size)
+    offset = 0
+    while offset < size:
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        yield from pickle.loads(zlib.decompress(data[offset:offset + length]))
+        offset += length
+
+
+def _load(root, directory, header):
+    """Rebuilds the open list, the open g values and the closed table from a checkpoint."""
+    pushed = {} # 状态 -> (g, 父状态), 保留代价最小的记录
+    for state, g, parent_state in _read_log(os.path.join(directory, _PUSHES), header['pushes'][1]):
+        known = pushed.get(state)
+        if known is None or g < known[0]:
+            pushed[state] = (g, parent_state)
+    closed = {}
+    for state in _read_log(os.path.join(directory, _CLOSED), header['closed'][1]):
+        g, parent_state = pushed.pop(state)
+        closed[state] = (parent_state, g)
+    OPEN = []
+    open_g = {}
+    for state, (g, parent_state) in pushed.items():
+        node = root if state == root.state else root.restore(state, g)
+        OPEN.append((node.f, -node.g, len(OPEN), node, parent_state))
+        open_g[state] = g
+    heapq.heapify(OPEN)
+    return OPEN, open_g, closed
+
+
+class _Writer:
+    """Appends the records of every checkpoint to the logs and replaces the header, in a background thread."""
+    def __init__(self, directory, header):
+        self.directory = directory
+        self.header = dict(header)
+        for name, key in ((_PUSHES, 'pushes'), (_CLOSED, 'closed')): # 丢弃上次检查点之后写了一半的记录
+            with open(os.path.join(directory, name), 'r+b') as f:
+                f.truncate(header[key][1])
+        self.jobs = queue.Queue()
+        self.error = None # 写入线程中的异常, 由下一次 submit 或 close 抛出
+        self.thread = threading.Thread(target=self._run, name='checkpoint', daemon=True)
+        self.thread.start()
+
+    def submit(self, pushes, closes, counters):
+        """Hands over the records added since the previous checkpoint and the current counters.
+        Raises the error of a previous checkpoint, if writing it failed."""
+        if self.error is not None:
+            raise self.error
+        self.jobs.put((pushes, closes, list(counters)))
+
+    def close(self):
+        """Waits for the checkpoints already submitted to be written, raising the error of one that failed."""
+        self.jobs.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            try:
+                self._write(*job)
+            except Exception as e: # 之后的检查点都不可靠, 不再写入
+                self.error = e
+                return
+
+    def _write(self, pushes, closes, counters):
+        """Appends the records of one checkpoint to the logs, then replaces the header."""
+        for name, key, records in ((_PUSHES, 'pushes', pushes), (_CLOSED, 'closed', closes)):
+            if records:
+                data = zlib.compress(pickle.dumps(records, pickle.HIGHEST_PROTOCOL))
+                with open(os.path.join(self.directory, name), 'ab') as f:
+                    f.write(_LENGTH.pack(len(data)))
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.header[key] = [self.header[key][0] + len(records),
+                                    self.header[key][1] + _LENGTH.size + len(data)]
+        self.header.update(zip(_COUNTERS, counters))
+        path = os.path.join(self.directory, _HEADER)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.header, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
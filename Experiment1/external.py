@@ -0,0 +1,246 @@
+"""External-memory A* with delayed duplicate detection.
+
+`ExternalAstar` keeps neither the open list nor the closed set in memory. The
+states are 64-bit keys (the packed states of `PackedFifteensNode`) stored in
+one file per bucket (g, h): g is the depth from the root and h the heuristic.
+Buckets are processed in increasing f = g + h, and in increasing g within the
+same f, as in External A* (Edelkamp, Jabbar and Schrodl, 2004).
+
+Children are not checked against anything when they are generated: they are
+sorted by bucket and appended to the bucket files as sorted runs, in large
+sequential writes. When a bucket is about to be expanded, its runs are merged
+and the duplicates inside it are removed, then the states already in the
+closed buckets (g - 1, h) and (g - 2, h) are subtracted, by binary search over
+those files mapped in memory. In an undirected graph with unit costs and a
+consistent heuristic, these are the only buckets where a duplicate can be, so
+every state is expanded once, at its optimal depth. The deduplicated bucket is
+kept as a closed file, which is also used to trace the solution path back.
+
+No bucket is ever held in memory as a whole. The runs are merged as a stream:
+`chunk_size` states of every run are read at a time, and the merged states are
+written to the closed file as they come. Expanding the bucket then reads the
+closed file back in chunks of `chunk_size` states.
+
+"""
+import heapq
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from stats import instrumented
+from vectorized import batch_problem
+
+_KEY = np.dtype('<u8') # 文件中的状态: 小端 64 位无符号整数
+
+
+@instrumented
+def ExternalAstar(root, directory=None, chunk_size=65536, problem=None, stats=None):
+    """Runs external-memory A* given the root node, with the open and closed states on disk.
+
+    The problem must have unit costs and reversible moves, and its heuristic must be
+    consistent, like the sliding tile puzzles with `SlidingTileNode.evaluate_heuristic`.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved, e.g. a `PackedFifteensNode`.
+
+    directory: str, optional
+        The directory of the bucket files. Default is None: a temporary directory,
+        removed when the search is over.
+
+    chunk_size: int, optional
+        The number of states expanded at once. Default is 65536.
+
+    problem: object, optional
+        The batch problem that encodes, expands and evaluates the states,
+        see `vectorized.SlidingTileBatch`. Default is `batch_problem(root)`.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search. `on_expand` is not called,
+        and `peak_open` is the size of the largest bucket. Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node.
+            If there is no solution it returns an empty list, like `Astar`.
+    """
+    if problem is None:
+        problem = batch_problem(root)
+    temporary = directory is None
+    if temporary:
+        directory = tempfile.mkdtemp(prefix='external-astar-')
+    else:
+        os.makedirs(directory, exist_ok=True)
+    try:
+        buckets = _Buckets(directory, chunk_size)
+        root_keys = np.array([problem.encode(root)], dtype=_KEY)
+        buckets.append(0, int(problem.heuristic(problem.decode(root_keys))[0]), root_keys)
+        while buckets.pending:
+            _, g, h = heapq.heappop(buckets.pending)
+            keys, dropped = buckets.merge(g, h)
+            if stats is not None:
+                stats.duplicates += dropped
+                stats.observe(len(keys), buckets.closed_size)
+            for start in range(0, len(keys), chunk_size):
+                chunk = np.asarray(keys[start:start + chunk_size])
+                if h == 0:
+                    goals = np.flatnonzero(problem.is_goal(chunk))
+                    if len(goals) > 0:
+                        return problem.path(root, _trace(problem, buckets, g, int(chunk[goals[0]])))
+                _, child_keys, child_boards, _ = problem.expand(chunk, problem.decode(chunk))
+                child_hs = problem.heuristic(child_boards)
+                for child_h in np.unique(child_hs):
+                    buckets.append(g + 1, int(child_h), child_keys[child_hs == child_h])
+                if stats is not None:
+                    stats.expand_batch(len(chunk), len(child_keys))
+            del keys
+        return []
+    finally:
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+class _Buckets:
+    """The bucket files of one search, open runs and closed states.
+
+    Attributes
+    ----------
+    pending : list
+        The heap of the (f, g, h) of the buckets that have open runs.
+
+    closed_size : int
+        The number of states in the closed files.
+    """
+    def __init__(self, directory, chunk_size):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.pending = []
+        self.closed_size = 0
+        self._runs = {} # (g, h) -> 各个有序段的长度
+
+    def _path(self, g, h, kind):
+        return os.path.join(self.directory, '{}-{}.{}'.format(g, h, kind))
+
+    def append(self, g, h, keys):
+        """Appends the given keys to bucket (g, h) as one sorted run."""
+        if (g, h) not in self._runs:
+            self._runs[(g, h)] = []
+            heapq.heappush(self.pending, (g + h, g, h))
+        self._runs[(g, h)].append(len(keys))
+        with open(self._path(g, h, 'open'), 'ab') as f:
+            np.sort(keys).astype(_KEY, copy=False).tofile(f)
+
+    def merge(self, g, h):
+        """Turns the open runs of bucket (g, h) into its closed file of new states.
+
+        The runs are merged `chunk_size` states at a time, see `_merge_runs`,
+        so the bucket is never loaded in memory as a whole.
+
+        Returns
+        -------
+            keys : array
+                The new states of the bucket, sorted, mapped in memory from its closed file.
+
+            dropped : int
+                The number of duplicates removed from its runs.
+        """
+        path = self._path(g, h, 'open')
+        runs = np.memmap(path, dtype=_KEY, mode='r')
+        previous = [closed for closed in (self.closed(g - 1, h), self.closed(g - 2, h)) if closed is not None]
+        kept = 0
+        with open(self._path(g, h, 'closed'), 'wb') as f:
+            for keys in _merge_runs(runs, self._runs.pop((g, h)), self.chunk_size):
+                for closed in previous: # 之前扩展过的重复
+                    keys = keys[~_contains(closed, keys)]
+                keys.tofile(f)
+                kept += len(keys)
+        generated = len(runs)
+        del runs
+        os.remove(path)
+        self.closed_size += kept
+        keys = self.closed(g, h)
+        return (np.empty(0, dtype=_KEY) if keys is None else keys), generated - kept
+
+    def closed(self, g, h):
+        """Returns the closed states of bucket (g, h) mapped in memory, or None if it has none."""
+        path = self._path(g, h, 'closed')
+        if g < 0 or not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        return np.memmap(path, dtype=_KEY, mode='r')
+
+
+def _merge_runs(runs, lengths, chunk_size):
+    """Merges consecutive sorted runs of keys, reading at most `chunk_size` keys of every run at a time.
+
+    Parameters
+    ----------
+    runs : array
+        The runs one after the other, e.g. mapped in memory from a file.
+
+    lengths : list of ints
+        The length of every run.
+
+    chunk_size : int
+        The number of keys of a run read at once.
+
+    Yields
+    ------
+        keys : array
+            The merged keys without duplicates, in increasing order across all the chunks.
+    """
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    buffers = [runs[:0]] * len(lengths)
+    last = None
+    while True:
+        for i, buffer in enumerate(buffers):
+            if len(buffer) == 0 and starts[i] < ends[i]:
+                buffers[i] = np.array(runs[starts[i]:min(starts[i] + chunk_size, ends[i])])
+                starts[i] += len(buffers[i])
+        live = [i for i, buffer in enumerate(buffers) if len(buffer) > 0]
+        if not live:
+            return
+        # 不超过各段缓冲区最后一个键的最小值的键都已读入, 可以输出
+        bound = min(buffers[i][-1] for i in live)
+        taken = []
+        for i in live:
+            n = np.searchsorted(buffers[i], bound, side='right')
+            taken.append(buffers[i][:n])
+            buffers[i] = buffers[i][n:]
+        keys = np.unique(np.concatenate(taken)) # 同一个桶内的重复
+        if last is not None and keys[0] == last: # 上一块的最后一个键可能在下一块的段中再次出现
+            keys = keys[1:]
+        if len(keys) > 0:
+            last = keys[-1]
+            yield keys
+
+
+def _contains(sorted_keys, keys):
+    """Returns which of `keys` are in the sorted array `sorted_keys`."""
+    positions = np.searchsorted(sorted_keys, keys)
+    found = positions < len(sorted_keys)
+    found[found] = sorted_keys[positions[found]] == keys[found]
+    return found
+
+
+def _trace(problem, buckets, depth, key):
+    """Returns the keys from the first state after the root to the goal state `key` found at `depth`,
+    by looking for a parent of every state in the closed files one level up."""
+    if depth == 0:
+        return []
+    keys = [key]
+    for g in range(depth - 1, 0, -1):
+        current = np.array([keys[-1]], dtype=_KEY)
+        _, neighbors, boards, _ = problem.expand(current, problem.decode(current))
+        for neighbor, h in zip(neighbors, problem.heuristic(boards)):
+            closed = buckets.closed(g, int(h))
+            if closed is not None and _contains(closed, np.array([neighbor], dtype=_KEY))[0]:
+                keys.append(int(neighbor))
+                break
+        else:
+            raise ValueError('no parent of state {} at depth {}'.format(keys[-1], g))
+    return list(reversed(keys))
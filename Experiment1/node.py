@@ -29,6 +29,8 @@ class Node(ABC):
         The hashable representation of the search state of this node.
 
     """
+    __slots__ = ('parent', 'g', 'f', 'state')
+
     def __init__(self, parent, g):
         self.parent = parent
         self.g = g
@@ -0,0 +1,233 @@
+"""Hash-distributed parallel A* (HDA*).
+
+Every search state is owned by one worker process, chosen by hashing
+`node.state`. A worker expands the nodes it owns in best-first order and sends
+every generated child to the owner of the child's state, in batches. Workers
+only keep `state -> (g, parent_state)` for the states they own, so the search
+tree is spread over all the processes and the solution path is traced back
+state by state once the search is over.
+
+The incumbent (the cost of the best solution found so far) is shared by all
+the workers. The search is over when every worker is idle and every message
+that was sent has been received: at that point no open node has f smaller than
+the incumbent, so with an admissible heuristic the incumbent is optimal.
+
+"""
+import heapq
+import multiprocessing
+import os
+import queue
+import time
+
+from search import _extend_path
+from stats import instrumented
+
+_STOP = None # 让工作进程退出的消息
+
+
+@instrumented
+def ParallelAstar(root, processes=None, batch_size=64, stats=None):
+    """Runs hash-distributed parallel A* given the root node over a pool of processes.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    processes: int, optional
+        The number of worker processes. Default is the number of CPUs.
+
+    batch_size: int, optional
+        The number of nodes a worker expands between two looks at its inbox. The children
+        generated for another worker are buffered and sent in one message per round,
+        or as soon as `batch_size` of them are waiting. Default is 64.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of all the workers added together. Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node.
+            If there is no solution it returns an empty list, like `Astar`.
+    """
+    if root.is_goal():
+        return [root]
+    processes = processes or os.cpu_count() or 1
+    ctx = multiprocessing.get_context('fork')
+    inboxes = [ctx.Queue() for _ in range(processes)]
+    results = ctx.Queue()
+    incumbent = ctx.RawValue('d', float('inf'))
+    incumbent_lock = ctx.Lock()
+    sent = ctx.RawArray('q', processes)
+    received = ctx.RawArray('q', processes)
+    idle = ctx.RawArray('b', processes)
+
+    workers = []
+    for rank in range(processes):
+        worker = ctx.Process(target=_worker, args=(rank, inboxes, results, incumbent, incumbent_lock,
+                                                   sent, received, idle, batch_size))
+        worker.daemon = True
+        worker.start()
+        workers.append(worker)
+
+    try:
+        sent[0] += 1
+        inboxes[hash(root.state) % processes].put([(root, None)])
+        _wait_for_termination(workers, sent, received, idle)
+
+        states = []
+        if incumbent.value < float('inf'):
+            goal_state = None
+            while goal_state is None: # 找到代价等于最终 incumbent 的目标状态
+                message = results.get()
+                if message[0] == 'goal' and message[1] == incumbent.value:
+                    goal_state = message[2]
+            states.append(goal_state)
+            while True: # 逐个状态向其所属进程询问父状态
+                inboxes[hash(states[-1]) % processes].put(('trace', states[-1]))
+                message = _receive(results, 'trace')
+                if message[2] is None:
+                    break
+                states.append(message[2])
+
+        if stats is not None:
+            for inbox in inboxes:
+                inbox.put(('stats',))
+            for _ in range(processes):
+                _, expanded, generated, duplicates, peak_open, peak_closed = _receive(results, 'stats')
+                stats.expanded += expanded
+                stats.generated += generated
+                stats.duplicates += duplicates
+                stats.peak_open += peak_open
+                stats.peak_closed += peak_closed
+    finally:
+        for inbox in inboxes:
+            inbox.put(_STOP)
+        for worker in workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+
+    if not states:
+        return []
+    path = [root]
+    for state in reversed(states[:-1]):
+        _extend_path(path, state)
+    return path
+
+
+def _receive(results, kind):
+    """Returns the next message of the given kind from the results queue, dropping the others."""
+    message = results.get()
+    while message[0] != kind:
+        message = results.get()
+    return message
+
+
+def _wait_for_termination(workers, sent, received, idle):
+    """Blocks until all the workers are idle and no message is in flight.
+
+    The counters are read twice, and the search is only considered over when
+    both readings agree, which rules out a worker waking up in between.
+    """
+    previous = None
+    while True:
+        for worker in workers:
+            if worker.exitcode not in (None, 0):
+                raise RuntimeError('a parallel A* worker exited with code {}'.format(worker.exitcode))
+        snapshot = (all(idle), sum(sent), sum(received))
+        done = snapshot[0] and snapshot[1] == snapshot[2]
+        if done and snapshot == previous:
+            return
+        previous = snapshot if done else None
+        time.sleep(0.005)
+
+
+def _worker(rank, inboxes, results, incumbent, incumbent_lock, sent, received, idle, batch_size):
+    """The loop of one worker process: receive owned nodes, expand them and route their children."""
+    processes = len(inboxes)
+    inbox = inboxes[rank]
+    OPEN = [] # 堆: (f, -g, 次序, 节点)
+    best = {} # 状态 -> (g, 父状态)
+    outboxes = [[] for _ in range(processes)]
+    counter = 0
+    counters = [0, 0, 0, 0, 0] # 扩展, 生成, 重复, open 峰值, closed 峰值
+
+    def flush(dest):
+        batch = outboxes[dest]
+        outboxes[dest] = []
+        sent[rank] += len(batch)
+        inboxes[dest].put(batch)
+
+    def push(node, parent_state):
+        nonlocal counter
+        if node.f >= incumbent.value:
+            return
+        known = best.get(node.state)
+        if known is not None and known[0] <= node.g:
+            counters[2] += 1
+            return
+        best[node.state] = (node.g, parent_state)
+        heapq.heappush(OPEN, (node.f, -node.g, counter, node))
+        counter += 1
+
+    while True:
+        messages = []
+        try:
+            messages.append(inbox.get(timeout=0.05) if not OPEN else inbox.get_nowait())
+            while True: # 先取出收件箱中所有的消息, 再扩展节点
+                messages.append(inbox.get_nowait())
+        except queue.Empty:
+            if not OPEN and not messages:
+                idle[rank] = 1
+                continue
+        for message in messages:
+            if message is _STOP:
+                return
+            if isinstance(message, tuple):
+                if message[0] == 'trace':
+                    results.put(('trace', message[1], best[message[1]][1]))
+                else:
+                    results.put(('stats',) + tuple(counters))
+                continue
+            idle[rank] = 0
+            received[rank] += len(message)
+            for node, parent_state in message:
+                push(node, parent_state)
+
+        for _ in range(batch_size): # 处理一批节点之后再检查收件箱
+            if not OPEN:
+                break
+            _, _, _, node = heapq.heappop(OPEN)
+            if node.g > best[node.state][0]: # 过期的节点
+                continue
+            if node.f >= incumbent.value:
+                OPEN = []
+                break
+            if node.is_goal():
+                with incumbent_lock:
+                    if node.g < incumbent.value:
+                        incumbent.value = node.g
+                        results.put(('goal', node.g, node.state))
+                continue
+            childrens = node.generate_children()
+            counters[0] += 1
+            counters[1] += len(childrens)
+            counters[3] = max(counters[3], len(OPEN))
+            counters[4] = max(counters[4], len(best))
+            for children in childrens:
+                children.parent = None # 父节点只用状态记录, 不随消息传递
+                dest = hash(children.state) % processes
+                if dest == rank:
+                    push(children, node.state)
+                else:
+                    outboxes[dest].append((children, node.state))
+                    if len(outboxes[dest]) >= batch_size:
+                        flush(dest)
+
+        for dest in range(processes): # 每轮结束时发送所有缓冲的子节点
+            if outboxes[dest]:
+                flush(dest)
+        if not OPEN:
+            idle[rank] = 1
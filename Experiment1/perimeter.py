@@ -0,0 +1,205 @@
+"""Perimeter search for the 15 puzzle.
+
+Every 15 puzzle has the same goal, so the states close to it can be solved
+once and for all. A breadth-first search from the goal finds every state within
+`depth` moves and its exact distance; the table is written to disk and mapped
+in memory when it is loaded, like the pattern databases.
+
+The forward search then uses the table twice:
+
+- a state in the table has an exact heuristic, and the search stops as soon as
+  it selects such a state: its f value is the cost of an optimal solution, and
+  the rest of the path is read from the table;
+- a state outside the table is more than `depth` moves away from the goal, so
+  its heuristic is raised to at least `depth + 1`.
+
+Both rules keep the heuristic consistent, so the solutions stay optimal.
+
+Usage:
+
+    python perimeter.py build perimeter-16.bin --depth 16
+
+>>> PerimeterNode.perimeter = Perimeter('perimeter-16.bin')
+>>> path = PerimeterAstar(PerimeterNode(input_str=initial_state_str))
+
+"""
+import argparse
+import heapq
+import os
+
+import numpy as np
+
+from problems import FifteensNode, pack_board, tile_tables
+from search import _successors
+from stats import instrumented
+from vectorized import SlidingTileBatch
+
+
+def build(depth):
+    """Finds every 15 puzzle state within `depth` moves of the goal.
+
+    The layers of the breadth-first search are computed with vectorized expansions:
+    a layer is the set of children of the previous one, minus the two layers before
+    it (the moves are reversible, so a child is never further back).
+
+    Returns
+    -------
+        keys : array of uint64
+            The packed states (see `pack_board`), sorted.
+
+        distances : array of uint8
+            The number of moves from every state to the goal.
+    """
+    if not 0 <= depth < 256:
+        raise ValueError('the depth of a perimeter must be in [0, 256), got {}'.format(depth))
+    problem = SlidingTileBatch(FifteensNode(board=tile_tables(16).goal))
+    layers = [np.array([problem.goal], dtype=np.uint64)]
+    previous = np.array([], dtype=np.uint64)
+    for _ in range(depth):
+        current = layers[-1]
+        _, children, _, _ = problem.expand(current, problem.decode(current))
+        children = np.unique(children)
+        children = children[~np.isin(children, current, assume_unique=True)]
+        children = children[~np.isin(children, previous, assume_unique=True)]
+        previous = current
+        layers.append(children)
+    keys = np.concatenate(layers)
+    distances = np.concatenate([np.full(len(layer), d, dtype=np.uint8) for d, layer in enumerate(layers)])
+    order = np.argsort(keys)
+    return keys[order], distances[order]
+
+
+def write(path, keys, distances):
+    """Writes a table to a file: the keys as little-endian 64-bit integers, then the distances, one byte each."""
+    with open(path + '.tmp', 'wb') as f:
+        keys.astype('<u8').tofile(f)
+        distances.astype(np.uint8).tofile(f)
+    os.replace(path + '.tmp', path)
+
+
+class Perimeter:
+    """A table of the states near the goal, loaded from a file written by `write`.
+
+    Parameters
+    ----------
+    path : str
+        The file of the table.
+
+    Attributes
+    ----------
+    depth : int
+        The largest distance in the table: every state within `depth` moves of the goal is in it.
+    """
+    def __init__(self, path):
+        size = os.path.getsize(path)
+        if size % 9 != 0:
+            raise ValueError('{} is not a perimeter table'.format(path))
+        count = size // 9
+        self.keys = np.memmap(path, dtype='<u8', mode='r', shape=(count,))
+        self.distances = np.memmap(path, dtype=np.uint8, mode='r', offset=count * 8, shape=(count,))
+        self.depth = int(self.distances.max())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def distance(self, board):
+        """Returns the exact number of moves from a flat board to the goal, or None if it is not in the table."""
+        key = pack_board(board)
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and int(self.keys[i]) == key:
+            return int(self.distances[i])
+        return None
+
+
+class PerimeterNode(FifteensNode):
+    """A FifteensNode whose heuristic uses the table `PerimeterNode.perimeter`: the exact distance
+    for the states in it, and at least `perimeter.depth + 1` for the others. Without a table it
+    behaves as a FifteensNode.
+
+    Attributes
+    ----------
+    exact : int or None
+        The exact distance of this state to the goal, if it is in the table.
+    """
+    __slots__ = ('exact',)
+    perimeter = None
+
+    def evaluate_heuristic(self):
+        """Returns the exact distance inside the perimeter, the larger of Manhattan plus linear conflicts
+        and `perimeter.depth + 1` outside."""
+        h = super(PerimeterNode, self).evaluate_heuristic()
+        self.exact = None
+        perimeter = self.perimeter
+        if perimeter is not None:
+            if h <= perimeter.depth: # h 是下界, 更远的状态不可能在表中
+                self.exact = perimeter.distance(self.board)
+            h = self.exact if self.exact is not None else max(h, perimeter.depth + 1)
+        return h
+
+
+@instrumented
+def PerimeterAstar(root, stats=None):
+    """Runs the A* algorithm given a `PerimeterNode`, stopping at the first selected state of the perimeter table.
+
+    An open state is pushed again when a cheaper path to it is found, and the old entry
+    is skipped when it is popped, as in `BucketAstar`.
+
+    Parameters
+    ----------
+    root: PerimeterNode
+        The start node of the problem to be solved.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search. Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node, like `Astar`.
+            If there is no solution it returns an empty list.
+    """
+    OPEN = [(root.f, -root.g, 0, root)] # 堆: (f, -g, 次序, 节点), f 相同时优先扩展更深的节点
+    open_g = {root.state: root.g} # open 中的状态 -> g
+    close_set = set()
+    counter = 1
+    while OPEN:
+        node = heapq.heappop(OPEN)[3]
+        if node.state in close_set or open_g[node.state] != node.g: # 过期的节点
+            continue
+        if node.exact is not None: # 到达边界: 剩下的路径沿着表中距离递减的状态走到目标
+            path = node.get_path()
+            while path[-1].exact > 0:
+                path.append(next(c for c in path[-1].generate_children() if c.exact == path[-1].exact - 1))
+            return path
+        if node.is_goal():
+            return node.get_path()
+        del open_g[node.state]
+        close_set.add(node.state)
+        successors, make_child = _successors(node, stats)
+        if stats is not None:
+            stats.observe(len(OPEN), len(close_set))
+        for state, step_cost, move in successors:
+            g = node.g + step_cost
+            if state in close_set or open_g.get(state, float('inf')) <= g:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            open_g[state] = g
+            children = make_child(state, step_cost, move)
+            heapq.heappush(OPEN, (children.f, -g, counter, children))
+            counter += 1
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the perimeter table of the 15 puzzle.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='find every state within some moves of the goal')
+    build_parser.add_argument('path', help='the file to write the table to')
+    build_parser.add_argument('--depth', type=int, default=16, help='the number of moves from the goal (default: 16)')
+    args = parser.parse_args(argv)
+    write(args.path, *build(args.depth))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Portfolio solving: several search configurations race on the same instance.
+
+Every `Configuration` runs in its own process. The first optimal solution
+wins and the other processes are killed at once, so the time to solve an
+instance is the time of the configuration that suits it best. Configurations
+that do not prove optimality (weighted or anytime searches) report their
+solutions too: if no optimal solution arrives before the deadline, the
+cheapest one found so far is returned.
+
+Examples
+----------
+>>> path, winner = solve_portfolio(FifteensNode(input_str=initial_state_str), deadline=30)
+
+"""
+import multiprocessing
+import queue
+import time
+
+from patterndb import PatternDatabaseNode
+from problems import SlidingTileNode
+from search import AnytimeAstar, BucketAstar, IDAstar, OPTIMAL_ENGINES, PredecessorAstar
+from solver import apply_moves
+from vectorized import BatchAstar
+
+_POLL = 0.1 # 检查工作进程是否还活着的间隔 (秒)
+
+
+class Configuration:
+    """One search configuration of a portfolio.
+
+    Parameters
+    ----------
+    name : str
+        The name of the configuration, returned with its solution.
+
+    engine : callable
+        The search algorithm, e.g. `search.Astar`.
+
+    make_root : callable, optional
+        Builds the root node of this configuration from the root given to the portfolio,
+        e.g. to use another heuristic. Its nodes must have the same moves. Default is None.
+
+    optimal : bool, optional
+        Whether the solutions of the engine are optimal. Default is None, True for the engines
+        of `search.OPTIMAL_ENGINES` and False for the others.
+
+    anytime : bool, optional
+        Whether the engine takes an `on_solution(path, bound)` callback like `AnytimeAstar`,
+        in which case every solution is reported, optimal when its bound is 1. Default is False.
+
+    **kwargs :
+        Passed to the engine.
+    """
+    def __init__(self, name, engine, make_root=None, optimal=None, anytime=False, **kwargs):
+        self.name = name
+        self.engine = engine
+        self.make_root = make_root
+        self.optimal = engine in OPTIMAL_ENGINES if optimal is None else optimal
+        self.anytime = anytime
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return 'Configuration({!r})'.format(self.name)
+
+
+def default_portfolio(root):
+    """Returns the configurations raced by default on a root node.
+
+    For sliding tile puzzles they are bucketed A*, batched A*, IDA* and two ARA* with different
+    initial weights (3 and a greedier 8), plus bucketed A* with the pattern databases when
+    `PatternDatabaseNode.database` is loaded. For other problems they are bucketed A*, A* with
+    a predecessor table and the two ARA*. `search.Astar` is left out: it never lowers the cost
+    of an open state, so its first solution is not always optimal.
+    """
+    anytime = [Configuration('anytime', AnytimeAstar, anytime=True),
+               Configuration('anytime/w8', AnytimeAstar, anytime=True, weight=8.0)]
+    if isinstance(root, SlidingTileNode):
+        configs = [Configuration('bucket', BucketAstar), Configuration('batch', BatchAstar, optimal=True),
+                   Configuration('idastar', IDAstar)] + anytime
+        if PatternDatabaseNode.database is not None and len(root.board) == 16:
+            configs.append(Configuration('bucket/pdb', BucketAstar, make_root=lambda r: PatternDatabaseNode(board=r.board)))
+        return configs
+    return [Configuration('bucket', BucketAstar), Configuration('predecessor', PredecessorAstar)] + anytime
+
+
+def solve_portfolio(root, configs=None, deadline=None):
+    """Races several configurations on a root node, each in its own process.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    configs: list of Configuration, optional
+        The configurations to race. Default is `default_portfolio(root)`.
+
+    deadline: float, optional
+        The seconds to wait for an optimal solution. Default is None, no limit. A worker that
+        dies without a result (e.g. killed for lack of memory) counts as finished.
+
+    Returns
+    -------
+        path: list of Nodes
+            The first optimal solution, or the cheapest solution found before the deadline, built from
+            `root` like the result of `Astar`. It is an empty list if no solution was found.
+
+        winner: str or None
+            The name of the configuration that found the solution, None if there is none.
+    """
+    if configs is None:
+        configs = default_portfolio(root)
+    end = None if deadline is None else time.perf_counter() + deadline
+    ctx = multiprocessing.get_context('fork')
+    results = ctx.Queue()
+    workers = []
+    for index, config in enumerate(configs):
+        worker = ctx.Process(target=_run, args=(index, config, root, results))
+        worker.daemon = True
+        worker.start()
+        workers.append(worker)
+
+    best = None # (代价, 配置名, 移动序列)
+    running = set(range(len(workers))) # 还没有结束的配置
+    try:
+        while running:
+            timeout = _POLL if end is None else min(_POLL, end - time.perf_counter())
+            if timeout <= 0:
+                break
+            try:
+                message = results.get(timeout=timeout)
+            except queue.Empty: # 进程先写完消息再退出, 队列空了还没有报告结束的死进程不会再有结果
+                running -= {i for i in running if not workers[i].is_alive()}
+                continue
+            if message[0] == 'done':
+                running.discard(message[1])
+                continue
+            _, name, moves, cost, optimal = message
+            if best is None or cost < best[0] or optimal:
+                best = (cost, name, moves)
+            if optimal:
+                break
+    finally:
+        for worker in workers: # 其余的配置不再需要
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+
+    if best is None:
+        return [], None
+    return apply_moves(root, best[2]), best[1]
+
+
+def _run(index, config, root, results):
+    """The body of the process of the configuration at `index`: runs it and reports its solutions."""
+    def report(path, optimal):
+        if path:
+            results.put(('solution', config.name, [node.get_move() for node in path[1:]], path[-1].g, optimal))
+
+    try:
+        if config.make_root is not None:
+            root = config.make_root(root)
+        if config.anytime:
+            config.engine(root, on_solution=lambda path, bound: report(path, bound <= 1), **config.kwargs)
+        else:
+            report(config.engine(root, **config.kwargs), config.optimal)
+    finally:
+        results.put(('done', index))
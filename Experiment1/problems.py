@@ -1,8 +1,13 @@
 from node import Node
-import copy
 
-class FifteensNode(Node):
-    """Extends the Node class to solve the 15 puzzle.
+
+class SlidingTileNode(Node):
+    """Extends the Node class to solve sliding tile puzzles of any size: the 8 puzzle (3x3),
+    the 15 puzzle (4x4), the 24 puzzle (5x5), ...
+
+    The legal moves of the empty cell from every position, the goal board and the
+    heuristic tables are computed once per board size (see `TileTables`) and shared
+    by all the nodes, so generating children and testing the goal are table lookups.
 
     Parameters
     ----------
@@ -10,93 +15,131 @@ class FifteensNode(Node):
         The parent node. It is optional only if the input_str is provided. Default is None.
 
     g : int or float, optional
-        The cost to reach this node from the start node : g(n).
-        In this puzzle it is the number of moves to reach this node from the initial configuration.
+        The cost to reach this node from the start node : g(n), the number of moves.
         It is optional only if the input_str is provided. Default is 0.
 
-    board : list of lists
-        The two-dimensional list that describes the state. It is a 4x4 array of values 0, ..., 15.
+    board : list of lists or tuple
+        The size x size array of values 0, ..., size * size - 1 that describes the state, either as
+        a two-dimensional list or flat in row-major order. It is stored flat, as a tuple.
         It is optional only if the input_str is provided. Default is None.
 
     input_str : str
-        The input string to be parsed to create the board.
+        The input string to be parsed to create the board, one row per line.
         The argument 'board' will be ignored, if input_str is provided.
-        Example: input_str = '1 2 3 4\n5 6 7 8\n9 10 0 11\n13 14 15 12' # 0 represents the empty cell
+        Example: input_str = '1 2 3\n4 0 5\n7 8 6' # 0 represents the empty cell
 
-    Examples
+    blank : int, optional
+        The position of the empty cell in the flat board, if it is already known. Default is None.
+
+    Attributes
     ----------
-    Initialization with an input string (Only the first/root construction call should be formatted like this):
-    >>> n = FifteensNode(input_str=initial_state_str)
-    >>> print(n)
-      5  1  4  8
-      7     2 11
-      9  3 14 10
-      6 13 15 12
+    board : tuple
+        The values of the board in row-major order, 0 for the empty cell.
 
-    Generating a child node (All the child construction calls should be formatted like this) ::
-    >>> n = FifteensNode(parent=p, g=p.g+c, board=updated_board)
-    >>> print(n)
-      5  1  4  8
-      7  2    11
-      9  3 14 10
-      6 13 15 12
+    blank : int
+        The position of the empty cell in the flat board.
+
+    md : int
+        The sum of the Manhattan distances of the tiles to their goal positions.
+
+    lc : int
+        The number of tiles that must leave their row or column because of a linear conflict.
+
+    Examples
+    ----------
+    >>> n = SlidingTileNode(input_str='1 2 3\n4 0 5\n7 8 6')
+    >>> path = Astar(n)
 
     """
+    __slots__ = ('board', 'blank', 'md', 'lc')
 
-    def __init__(self, parent=None, g=0, board=None, input_str=None):
-        # NOTE: You shouldn't modify the constructor
+    def __init__(self, parent=None, g=0, board=None, input_str=None, blank=None):
         if input_str:
-            self.board = []
-            for i, line in enumerate(filter(None, input_str.splitlines())):
-                self.board.append([int(n) for n in line.split()])
+            self.board = tuple(int(n) for n in input_str.split())
+        elif board and not isinstance(board[0], int):
+            self.board = tuple(n for row in board for n in row)
         else:
-            self.board = board
+            self.board = tuple(board)
+        self.blank = self.board.index(0) if blank is None else blank
+
+        super(SlidingTileNode, self).__init__(parent, g)
 
-        super(FifteensNode, self).__init__(parent, g)
+    @property
+    def tables(self):
+        """The `TileTables` of the size of this board."""
+        return tile_tables(len(self.board))
 
     def generate_children(self):
-        """Generates children by trying all 4 possible moves of the empty cell.
+        """Generates children by trying all the possible moves of the empty cell,
+        except the move that would undo the move from the parent node.
 
         Returns
         -------
             children : list of Nodes
                 The list of child nodes.
         """
+        return [self.make_child(state, step_cost, move) for state, step_cost, move in self.successors()]
 
-        # TODO: add your code here
-        # You should use self.board to produce children. Don't forget to create a new board for each child
-        # e.g you can use copy.deepcopy function from the standard library.
-        childrens = []
-        row = -1; col = -1;
-        for i in range(len(self.board)):
-            for j in range(len(self.board[i])):
-                if self.board[i][j] == 0:
-                    row = i;
-                    col = j;
-                    break
-        if row == -1 or col == -1:
-            return childrens
-        if row - 1 >= 0:
-            child_board = copy.deepcopy(self.board)
-            child_board[row][col], child_board[row - 1][col] = child_board[row - 1][col], child_board[row][col]
-            children = FifteensNode(parent=self, g=self.g+1, board=child_board, input_str=None)
-            childrens.append(children)
-        if row + 1 <= 3:
-            child_board = copy.deepcopy(self.board)
-            child_board[row][col], child_board[row + 1][col] = child_board[row + 1][col], child_board[row][col]
-            children = FifteensNode(parent=self, g=self.g+1, board=child_board, input_str=None)
-            childrens.append(children)
-        if col - 1 >= 0:
-            child_board = copy.deepcopy(self.board)
-            child_board[row][col], child_board[row][col - 1] = child_board[row][col - 1], child_board[row][col]
-            children = FifteensNode(parent=self, g=self.g+1, board=child_board, input_str=None)
-            childrens.append(children)
-        if col + 1 <= 3:
-            child_board = copy.deepcopy(self.board)
-            child_board[row][col], child_board[row][col + 1] = child_board[row][col + 1], child_board[row][col]
-            children = FifteensNode(parent=self, g=self.g+1, board=child_board, input_str=None)
-            childrens.append(children)
-        return childrens
+    def successors(self):
+        """Yields the successors of this node without constructing them, for the engines that
+        check the state of a child against their open and closed sets before building it.
+
+        Yields
+        -------
+            successor : tuple
+                (state, step_cost, move): the state of the child, the cost of the move (always 1)
+                and the direction the empty cell moves, 'U', 'D', 'L' or 'R'.
+        """
+        board = self.board
+        blank = self.blank
+        parent = self.parent
+        undo = parent.blank if isinstance(parent, SlidingTileNode) else -1 # 回到父节点的移动
+        tables = tile_tables(len(board))
+        for target in tables.moves[blank]:
+            if target == undo:
+                continue
+            yield self._moved_state(target), 1, tables.directions[target - blank]
+
+    def make_child(self, state, step_cost, move):
+        """Constructs the child of this node described by one of its successors.
+
+        Parameters
+        ----------
+        state, step_cost, move :
+            A successor yielded by `successors`.
+
+        Returns
+        -------
+            child : SlidingTileNode
+                The child node, of the class of this node.
+        """
+        target = self.blank + tile_tables(len(self.board)).offsets[move]
+        return type(self)(parent=self, g=self.g + step_cost, board=self._moved_board(state, target), blank=target)
+
+    def restore(self, state, g):
+        """Builds a node of the same puzzle from a state and its cost, without parent, e.g. to resume a search.
+
+        Returns
+        -------
+            node : SlidingTileNode
+                The node, of the class of this node.
+        """
+        return type(self)(g=g, board=state)
+
+    def _moved_state(self, target):
+        """Returns the state after moving the empty cell to `target`."""
+        return self._swapped(target)
+
+    def _moved_board(self, state, target):
+        """Returns the board after moving the empty cell to `target`, given the state it has then."""
+        return state
+
+    def _swapped(self, target):
+        """Returns a copy of the board with the empty cell moved to `target`."""
+        board = list(self.board)
+        board[self.blank] = board[target]
+        board[target] = 0
+        return tuple(board)
 
     def is_goal(self):
         """Decides whether this search state is the final state of the puzzle.
@@ -106,46 +149,78 @@ class FifteensNode(Node):
             is_goal : bool
                 True if this search state is the goal state, False otherwise.
         """
-
-        # TODO: add your code here
-        # You should use self.board to decide.
-        flag = True
-        for i in range(len(self.board)):
-            for j in range(len(self.board[i])):
-                if i == 3 and j == 3:
-                    if self.board[i][j] != 0:
-                        flag = False
-                else:
-                    if self.board[i][j] != i * 4 + j + 1:
-                        flag = False
-
-        return flag
+        return self.board == self.tables.goal
 
     def evaluate_heuristic(self):
         """Heuristic function h(n) that estimates the minimum number of moves
         required to reach the goal state from this node.
 
+        It is the Manhattan distance plus the linear conflicts: for every row
+        and column, each tile that has to leave the line to let the tiles that
+        belong to it pass each other costs 2 more moves. Both terms are kept on
+        the node (`md` and `lc`), so a child updates them in O(1) from its parent:
+        only the moved tile changes its distance, and only the two lines it
+        leaves and enters can change their conflicts.
+
         Returns
         -------
-            h : int or float
+            h : int
                 The heuristic value for this state.
         """
+        tables = tile_tables(len(self.board))
+        parent = self.parent
+        if isinstance(parent, SlidingTileNode):
+            blank = self.blank # 被移动的方块原来的位置
+            target = parent.blank # 被移动的方块现在的位置
+            tile = self.board[target]
+            self.md = parent.md - tables.manhattan[tile][blank] + tables.manhattan[tile][target]
+            size = tables.size
+            if abs(blank - target) == 1: # 横向移动, 只影响两列
+                lines = (size + blank % size, size + target % size)
+            else: # 纵向移动, 只影响两行
+                lines = (blank // size, target // size)
+            self.lc = parent.lc
+            for line in lines:
+                self.lc += _line_conflicts(self.board, line, tables) - _line_conflicts(parent.board, line, tables)
+        else:
+            self.md = sum(tables.manhattan[num][k] for k, num in enumerate(self.board))
+            self.lc = sum(_line_conflicts(self.board, line, tables) for line in range(len(tables.lines)))
+        return self.md + 2 * self.lc
 
-        # TODO: add your code here
-        # You may want to use self.board here.
-        h = 0;
-        for i in range(len(self.board)):
-            for j in range(len(self.board[i])):
-                if i == 3 and j == 3:
-                    target = 0
-                else:
-                    target = i * 4 + j + 1
-                num = self.board[i][j]
-                if num != target:
-                    x = num / 4
-                    y = num - 4 * x - 1
-                    h += (abs(x - i) + abs(y - j)) # 计算曼哈顿距离
+    def get_move(self):
+        """Returns the move that produced this node from its parent.
+
+        Returns
+        -------
+            move : str or None
+                The direction the empty cell moved: 'U', 'D', 'L' or 'R'. None for the root node.
+        """
+        if self.parent is None:
+            return None
+        return self.tables.directions[self.blank - self.parent.blank]
 
+    def estimate_to(self, other):
+        """Estimates the minimum number of moves between this node and another node,
+        i.e. the sum of the Manhattan distances of every tile between the two boards.
+
+        Parameters
+        ----------
+        other : SlidingTileNode
+            The node whose board is the target configuration.
+
+        Returns
+        -------
+            h : int
+                The admissible estimate of the number of moves between the two boards.
+        """
+        distances = self.tables.distances
+        target = [0] * len(other.board)
+        for k, num in enumerate(other.board):
+            target[num] = k
+        h = 0
+        for k, num in enumerate(self.board):
+            if num != 0:
+                h += distances[k][target[num]]
         return h
 
     def _get_state(self):
@@ -156,8 +231,7 @@ class FifteensNode(Node):
             state: tuple
                 The hashable representation of the search state
         """
-        # NOTE: You shouldn't modify this method.
-        return tuple([n for row in self.board for n in row])
+        return self.board
 
     def __str__(self):
         """Returns the string representation of this node.
@@ -167,24 +241,268 @@ class FifteensNode(Node):
             state_str : str
                 The string representation of the node.
         """
-        # NOTE: You shouldn't modify this method.
+        size = self.tables.size
         sb = []  # String builder
-        for row in self.board:
-            for i in row:
-                sb.append(' ')
-                if i == 0:
-                    sb.append('  ')
-                else:
-                    if i < 10:
-                        sb.append(' ')
-                    sb.append(str(i))
-            sb.append('\n')
+        for k, i in enumerate(self.board):
+            sb.append(' ')
+            if i == 0:
+                sb.append('  ')
+            else:
+                if i < 10:
+                    sb.append(' ')
+                sb.append(str(i))
+            if k % size == size - 1:
+                sb.append('\n')
         return ''.join(sb)
 
     def __lt__(self, other):
         return self.f < other.f
 
-    
+
+class FifteensNode(SlidingTileNode):
+    """Extends the SlidingTileNode class to solve the 15 puzzle, on a 4x4 board.
+
+    Parameters
+    ----------
+    parent : Node, optional
+        The parent node. It is optional only if the input_str is provided. Default is None.
+
+    g : int or float, optional
+        The cost to reach this node from the start node : g(n).
+        In this puzzle it is the number of moves to reach this node from the initial configuration.
+        It is optional only if the input_str is provided. Default is 0.
+
+    board : list of lists or tuple
+        The 4x4 array of values 0, ..., 15 that describes the state, either as a two-dimensional
+        list or flat in row-major order. It is stored flat, as a tuple of 16 values.
+        It is optional only if the input_str is provided. Default is None.
+
+    input_str : str
+        The input string to be parsed to create the board.
+        The argument 'board' will be ignored, if input_str is provided.
+        Example: input_str = '1 2 3 4\n5 6 7 8\n9 10 0 11\n13 14 15 12' # 0 represents the empty cell
+
+    Attributes
+    ----------
+    board : tuple
+        The 16 values of the board in row-major order, 0 for the empty cell.
+
+    Examples
+    ----------
+    Initialization with an input string (Only the first/root construction call should be formatted like this):
+    >>> n = FifteensNode(input_str=initial_state_str)
+    >>> print(n)
+      5  1  4  8
+      7     2 11
+      9  3 14 10
+      6 13 15 12
+
+    Generating a child node (All the child construction calls should be formatted like this) ::
+    >>> n = FifteensNode(parent=p, g=p.g+c, board=updated_board)
+    >>> print(n)
+      5  1  4  8
+      7  2    11
+      9  3 14 10
+      6 13 15 12
+
+    """
+    __slots__ = ()
+
+    def __init__(self, parent=None, g=0, board=None, input_str=None, blank=None):
+        super(FifteensNode, self).__init__(parent, g, board, input_str, blank)
+        if len(self.board) != 16:
+            raise ValueError('a 15 puzzle board has 16 cells, got {}'.format(len(self.board)))
+
+
+class PackedFifteensNode(FifteensNode):
+    """A FifteensNode whose state is the board packed into one 64-bit integer.
+
+    Every cell takes 4 bits, the k-th cell in row-major order at bits 4 * k,
+    so the state is a single small int instead of a tuple of 16 ints. It can be
+    stored in a `StateSet` for compact duplicate detection:
+
+    >>> path = Astar(PackedFifteensNode(input_str=initial_state_str), state_set=StateSet)
+
+    The state of a child is computed from the state of its parent, see `_moved_state`,
+    and passed to its constructor, so only the root packs its board.
+
+    Parameters
+    ----------
+    state : int, optional
+        The packed board, if already known. Default is None: it is computed by `pack_board`.
+    """
+    __slots__ = ()
+
+    def __init__(self, parent=None, g=0, board=None, input_str=None, blank=None, state=None):
+        if state is not None:
+            self.state = state
+        super(PackedFifteensNode, self).__init__(parent, g, board, input_str, blank)
+
+    def _get_state(self):
+        """Returns the board packed into a 64-bit integer, see `pack_board`."""
+        state = getattr(self, 'state', None) # 构造时给出的状态
+        return pack_board(self.board) if state is None else state
+
+    def make_child(self, state, step_cost, move):
+        """Constructs the child of this node described by one of its successors, with its packed state."""
+        target = self.blank + tile_tables(16).offsets[move]
+        return type(self)(parent=self, g=self.g + step_cost, board=self._moved_board(state, target), blank=target,
+                          state=state)
+
+    def restore(self, state, g):
+        """Builds a node from a packed state and its cost, without parent."""
+        return type(self)(g=g, board=unpack_board(state))
+
+    def _moved_state(self, target):
+        """Returns the packed state after moving the empty cell to `target`, from the state of this node."""
+        tile = self.board[target]
+        return self.state + (tile << 4 * self.blank) - (tile << 4 * target)
+
+    def _moved_board(self, state, target):
+        """Returns the board after moving the empty cell to `target`."""
+        return self._swapped(target)
+
+
+def pack_board(board):
+    """Packs a flat 4x4 board into a 64-bit integer, 4 bits per cell in row-major order.
+
+    Parameters
+    ----------
+    board : tuple
+        The 16 values of the board in row-major order, as in `FifteensNode.board`.
+
+    Returns
+    -------
+        state : int
+            The packed board. It is never 0 for a valid board.
+    """
+    state = 0
+    shift = 0
+    for num in board:
+        state |= num << shift
+        shift += 4
+    return state
+
+
+def unpack_board(state):
+    """Unpacks a 64-bit integer made by `pack_board` into a flat board (tuple of 16 values)."""
+    return tuple((state >> (4 * k)) & 0xF for k in range(16))
+
+
+class TileTables:
+    """Tables of a sliding tile puzzle of one size, shared by all its nodes.
+
+    Parameters
+    ----------
+    size : int
+        The number of rows (and columns) of the board.
+
+    Attributes
+    ----------
+    goal : tuple
+        The goal board: 1, ..., size * size - 1 in row-major order, then the empty cell.
+
+    moves : list of tuples
+        For every position of the empty cell, the positions it can move to.
+
+    directions : dict
+        The change of position of the empty cell -> the move 'U', 'D', 'L' or 'R'.
+
+    offsets : dict
+        The move 'U', 'D', 'L' or 'R' -> the change of position of the empty cell.
+
+    distances : list of lists
+        The Manhattan distance between every two positions.
+
+    manhattan : list of lists
+        manhattan[tile][position] is the distance of the tile at that position to its goal (0 for the empty cell).
+
+    lines : list of tuples
+        The positions of every row, then of every column.
+
+    line_codes : list of lists
+        line_codes[line][tile] is 1 + the index in the line of the goal position of the tile,
+        or 0 if the goal of the tile is not in the line.
+
+    conflicts : bytes
+        The linear conflicts of a line for every content, indexed by the `line_codes` of its
+        tiles as the digits of a number in base size + 1, see `_line_conflicts`.
+    """
+    def __init__(self, size):
+        cells = size * size
+        self.size = size
+        self.goal = tuple(range(1, cells)) + (0,)
+        self.moves = []
+        for k in range(cells):
+            row, col = divmod(k, size)
+            targets = []
+            if row - 1 >= 0:
+                targets.append(k - size)
+            if row + 1 < size:
+                targets.append(k + size)
+            if col - 1 >= 0:
+                targets.append(k - 1)
+            if col + 1 < size:
+                targets.append(k + 1)
+            self.moves.append(tuple(targets))
+        self.directions = {-size: 'U', size: 'D', -1: 'L', 1: 'R'}
+        self.offsets = {move: offset for offset, move in self.directions.items()}
+        self.distances = [[abs(a // size - b // size) + abs(a % size - b % size) for b in range(cells)]
+                          for a in range(cells)]
+        self.manhattan = [[0] * cells] + [[self.distances[k][tile - 1] for k in range(cells)]
+                                          for tile in range(1, cells)]
+        self.lines = [tuple(range(size * r, size * r + size)) for r in range(size)] + \
+                     [tuple(range(c, cells, size)) for c in range(size)]
+        self.line_codes = [[0] * cells for _ in self.lines]
+        for line, positions in enumerate(self.lines):
+            for i, k in enumerate(positions):
+                if k + 1 < cells: # 目标位置在 k 的方块是 k + 1
+                    self.line_codes[line][k + 1] = i + 1
+        counts = []
+        for index in range((size + 1) ** size):
+            goals = [] # 目标在本行(列)的方块的目标序号, 按它们在本行(列)的顺序
+            for _ in range(size):
+                index, code = divmod(index, size + 1)
+                if code:
+                    goals.append(code)
+            goals.reverse()
+            longest = [1] * len(goals) # 以每个方块结尾的最长有序子序列
+            for a in range(len(goals)):
+                for b in range(a):
+                    if goals[b] < goals[a] and longest[b] + 1 > longest[a]:
+                        longest[a] = longest[b] + 1
+            counts.append(len(goals) - max(longest, default=0))
+        self.conflicts = bytes(counts)
+
+
+_tables = {} # 格子数 -> TileTables
+
+
+def tile_tables(cells):
+    """Returns the `TileTables` of boards with the given number of cells, building them once."""
+    tables = _tables.get(cells)
+    if tables is None:
+        size = int(round(cells ** 0.5))
+        if size * size != cells or size < 2:
+            raise ValueError('a sliding tile board must be square, got {} cells'.format(cells))
+        tables = _tables[cells] = TileTables(size)
+    return tables
+
+
+def _line_conflicts(board, line, tables):
+    """Returns the number of tiles that must leave a row or column so that the
+    tiles whose goal is in that line can reach their goal positions.
+
+    It is the number of such tiles minus the length of the longest sequence of
+    them already in the goal order, looked up in `TileTables.conflicts`.
+    """
+    codes = tables.line_codes[line]
+    base = tables.size + 1
+    index = 0
+    for k in tables.lines[line]:
+        index = index * base + codes[board[k]]
+    return tables.conflicts[index]
+
 
 class SuperqueensNode(Node):
     """Extends the Node class to solve the Superqueens problem.
@@ -199,10 +517,10 @@ class SuperqueensNode(Node):
         In this problem it is the number of pairs of superqueens that can attack each other in this state configuration.
         Default is 1.
 
-    queen_positions : list of pairs
-        The list that stores the x and y positions of the queens in this state configuration.
-        Example: [(q1_y,q1_x),(q2_y,q2_x)]. Note that the upper left corner is the origin and y increases downward
-        Default is the empty list [].
+    queen_positions : sequence of pairs
+        The positions of the queens in this state configuration, stored as a tuple.
+        Example: ((q1_y,q1_x),(q2_y,q2_x)). Note that the upper left corner is the origin and y increases downward
+        Default is the empty tuple ().
         ------> x
         |
         |
@@ -232,9 +550,10 @@ class SuperqueensNode(Node):
 
     """
 
-    def __init__(self, parent=None, g=0, queen_positions=[], n=1):
-        # NOTE: You shouldn't modify the constructor
-        self.queen_positions = queen_positions
+    __slots__ = ('queen_positions', 'n')
+
+    def __init__(self, parent=None, g=0, queen_positions=(), n=1):
+        self.queen_positions = tuple(queen_positions)
         self.n = n
         super(SuperqueensNode, self).__init__(parent, g)
 
@@ -246,15 +565,24 @@ class SuperqueensNode(Node):
             children : list of Nodes
                 The list of child nodes.
         """
-        # TODO: add your code here
+        return [self.make_child(state, step_cost, move) for state, step_cost, move in self.successors()]
+
+    def successors(self):
+        """Yields the successors of this node without constructing them, for the engines that
+        check the state of a child against their open and closed sets before building it.
+
+        Yields
+        -------
+            successor : tuple
+                (state, step_cost, move): the queen positions of the child, the number of
+                new pairs of attacking queens and the position (y, x) of the new queen.
+        """
         # You should use self.queen_positions and self.n to produce children.
-        # Don't forget to create a new queen_positions list for each child.
-        # You can use copy.deepcopy function from the standard library.
-        childrens = []
+        # Don't forget to create a new queen_positions tuple for each child.
         x_flag = [False for x in range(self.n)]
         y_flag = [False for y in range(self.n)]
         if len(self.queen_positions) == self.n:
-            return childrens
+            return
         for tuple in self.queen_positions:
             x_flag[tuple[1]] = True
             y_flag[tuple[0]] = True
@@ -268,8 +596,7 @@ class SuperqueensNode(Node):
         directions = [(-2, 1), (-1, 2), (1, 2), (2, 1), (1, -2), (2, -1), (-1, -2), (-2, -1)] # 马的移动方向
         for i in range(self.n):
             if x_flag[i] == False:
-                new_positions = copy.deepcopy(self.queen_positions)
-                new_positions.append((next_y, i))
+                new_positions = (*self.queen_positions, (next_y, i))
                 cost = 0 # 计算新产生的耗费
                 for j in range(min(next_y, i)):
                     if (next_y - j - 1, i - j - 1) in new_positions:
@@ -280,9 +607,32 @@ class SuperqueensNode(Node):
                 for j in directions: # knight的攻击方式
                     if (next_y + j[0], i + j[1]) in new_positions:
                         cost += 1
-                children = SuperqueensNode(parent=self, g=self.g+cost, queen_positions=new_positions,n=self.n)
-                childrens.append(children)
-        return childrens
+                yield new_positions, cost, (next_y, i)
+
+    def make_child(self, state, step_cost, move):
+        """Constructs the child of this node described by one of its successors.
+
+        Parameters
+        ----------
+        state, step_cost, move :
+            A successor yielded by `successors`.
+
+        Returns
+        -------
+            child : SuperqueensNode
+                The child node.
+        """
+        return SuperqueensNode(parent=self, g=self.g+step_cost, queen_positions=state, n=self.n)
+
+    def restore(self, state, g):
+        """Builds a node of the same board size from a state and its cost, without parent, e.g. to resume a search.
+
+        Returns
+        -------
+            node : SuperqueensNode
+                The node.
+        """
+        return SuperqueensNode(g=g, queen_positions=state, n=self.n)
 
     def is_goal(self):
         """Decides whether all the queens are placed on the board.
@@ -314,6 +664,18 @@ class SuperqueensNode(Node):
             flag = False
         return flag
 
+    def get_move(self):
+        """Returns the move that produced this node from its parent.
+
+        Returns
+        -------
+            move : pair or None
+                The position (y, x) of the queen placed by the last move. None for the root node.
+        """
+        if self.parent is None:
+            return None
+        return self.queen_positions[-1]
+
     def evaluate_heuristic(self):
         """Heuristic function h(n) that estimates the minimum number of conflicts required to reach the final state.
 
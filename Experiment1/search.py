@@ -8,8 +8,15 @@ solve different problems.
 
 """
 import heapq
+import sys
+import time
+from collections import OrderedDict
+from buckets import BucketQueue
+from stats import instrumented
 
-def Astar(root):
+
+@instrumented
+def Astar(root, state_set=set, stats=None):
     """Runs the A* algorithm given the root node. The class of the root node
     defines the problem that's being solved. The algorithm either returns the solution
     as a path from the start node to the goal node or returns None if there's no solution.
@@ -19,6 +26,13 @@ def Astar(root):
     root: Node
         The start node of the problem to be solved.
 
+    state_set: callable, optional
+        The factory of the sets of open and closed states, e.g. `StateSet` for
+        the integer states of `PackedFifteensNode`. Default is `set`.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search. Default is None.
+
     Returns
     -------
         path: list of Nodes or None
@@ -39,27 +53,761 @@ def Astar(root):
     # You can access the state of a node by `node.state`. (You may also want to store evaluated states)
     # You should consider the states evaluated and the ones in the fringe to avoid repeated calculation in 5. above.
     # You can compare two node states by node1.state == node2.state
+    slices = _astar_slices(root, state_set, stats)
+    try:
+        next(slices) # 不分片, 一直运行到结束
+    except StopIteration as stop:
+        return stop.value
+
+
+def _astar_slices(root, state_set=set, stats=None, slice_size=None):
+    """The loop of `Astar` as a generator, shared with `asyncsearch.astar_slices`.
+
+    It yields (expanded, generated, f of the last expanded node, size of the open list)
+    after every `slice_size` expansions, never if `slice_size` is None, and returns the
+    path as the value of the StopIteration.
+    """
     res_path = []
     OPEN = [] # 堆
-    open_set = set() # 开集合 判断是否出现该状态
-    close_set = set() # 闭集合 判断是否出现该状态
+    open_set = state_set() # 开集合 判断是否出现该状态
+    close_set = state_set() # 闭集合 判断是否出现该状态
     OPEN.append(root)
     heapq.heapify(OPEN) # 使用heap, 加快计算速度
     open_set.add(root.state)
+    push, pop = _queue_ops(heapq.heappush, heapq.heappop, stats)
+    expanded = generated = 0
+    slice_end = slice_size # 这一片结束时的扩展数
     while len(OPEN) > 0:
-        node = heapq.heappop(OPEN) # 找到优先级最高的节点
+        node = pop(OPEN) # 找到优先级最高的节点
         if node.is_goal(): # 到达目标
             res_path = node.get_path()
             break
         else: # 不是目标
             open_set.remove(node.state)
             close_set.add(node.state)
-            childrens = node.generate_children()
-            for children in childrens: # 遍历所有子节点
-                if children.state in close_set:
+            successors, make_child = _successors(node, stats)
+            if stats is not None:
+                stats.observe(len(OPEN), len(close_set))
+            for state, step_cost, move in successors: # 遍历所有子节点, 重复的状态不构造节点
+                generated += 1
+                if state in close_set:
+                    pass
+                elif state not in open_set:
+                    open_set.add(state)
+                    push(OPEN, make_child(state, step_cost, move))
                     continue
-                elif children.state not in open_set:
-                    open_set.add(children.state)
-                    heapq.heappush(OPEN, children)
+                if stats is not None:
+                    stats.duplicates += 1
+            expanded += 1
+            if expanded == slice_end: # 一片结束, 等待继续
+                yield expanded, generated, node.f, len(OPEN)
+                slice_end += slice_size
 
     return res_path
+
+
+def _successors(node, stats):
+    """Returns the successors of a node as (state, step_cost, move) tuples, and the function
+    `make_child(state, step_cost, move)` that constructs the child node of one of them.
+
+    The nodes that have the successor protocol (`successors` and `make_child`, see
+    `SlidingTileNode`) are not constructed, and their heuristic not evaluated, until the
+    engine has checked their state. Other nodes are generated as usual, and each child is
+    its own move.
+    """
+    if hasattr(node, 'successors'):
+        return (node.successors() if stats is None else stats.successors(node)), node.make_child
+    childrens = node.generate_children() if stats is None else stats.expand(node)
+    return [(children.state, children.g - node.g, children) for children in childrens], _built_child
+
+
+def _queue_ops(push, pop, stats):
+    """Returns the push and pop of an open list, timed as 'queue' when `stats` times the search."""
+    if stats is None:
+        return push, pop
+    return stats.timed('queue', push), stats.timed('queue', pop)
+
+
+def _built_child(state, step_cost, children):
+    """The `make_child` of the nodes without the successor protocol."""
+    return children
+
+
+@instrumented
+def IDAstar(root, stats=None):
+    """Runs the iterative-deepening A* (IDA*) algorithm given the root node.
+
+    It explores the same search space as `Astar` by a series of depth-first
+    searches bounded by an f-threshold. After every iteration the threshold is
+    raised to the smallest f value that exceeded it. Only the current path is
+    kept in memory, so the memory used is linear in the depth of the solution.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search. Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node.
+            If there is no solution it returns an empty list, like `Astar`.
+    """
+    threshold = root.f
+    path = [root]
+    on_path = {root.state} # 当前路径上的状态, 用于避免环路
+    while True:
+        found, next_threshold = _bounded_dfs(path, on_path, threshold, stats)
+        if found:
+            return list(path)
+        if next_threshold is None: # 没有超过阈值的节点, 搜索空间已穷尽
+            return []
+        threshold = next_threshold
+
+
+def _bounded_dfs(path, on_path, threshold, stats):
+    """Depth-first search below the last node of `path` pruned at `threshold`.
+
+    Returns
+    -------
+        found: bool
+            True if `path` now ends with a goal node.
+
+        next_threshold: int or float or None
+            The smallest f value that exceeded `threshold`, None if there was none.
+    """
+    node = path[-1]
+    if node.f > threshold:
+        return False, node.f
+    if node.is_goal():
+        return True, None
+    next_threshold = None
+    if stats is None:
+        childrens = sorted(node.generate_children())
+    else:
+        childrens = sorted(stats.expand(node))
+        stats.observe(len(path))
+    for children in childrens:
+        if children.state in on_path:
+            if stats is not None:
+                stats.duplicates += 1
+            continue
+        path.append(children)
+        on_path.add(children.state)
+        found, t = _bounded_dfs(path, on_path, threshold, stats)
+        if found:
+            return True, None
+        path.pop()
+        on_path.remove(children.state)
+        if t is not None and (next_threshold is None or t < next_threshold):
+            next_threshold = t
+    return False, next_threshold
+
+
+@instrumented
+def BidirectionalAstar(root, goal, stats=None):
+    """Runs a bidirectional A* search between the root node and a goal node.
+
+    A forward frontier grows from `root` and a backward frontier grows from `goal`.
+    The moves of the problem must be reversible with symmetric costs (as in the
+    15 puzzle), so `generate_children` is used in both directions. Each step
+    expands the smaller frontier. The search stops once the best meeting point
+    found so far costs no more than the smallest f value of either frontier,
+    which proves it optimal for admissible heuristics.
+
+    If the nodes provide `estimate_to(other)` (see `FifteensNode`), it is used as
+    the heuristic towards `goal` and towards `root`; otherwise the forward frontier
+    uses `node.f` and the backward frontier falls back to uniform cost search.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    goal: Node
+        A node holding the goal state, e.g. FifteensNode(input_str=goal_str).
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search. Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node, made of
+            nodes of the forward direction. If there is no solution it returns an empty list.
+    """
+    if hasattr(root, 'estimate_to'):
+        priorities = (lambda n: n.g + n.estimate_to(goal), lambda n: n.g + n.estimate_to(root))
+    else:
+        priorities = (lambda n: n.f, lambda n: n.g)
+    # 两个方向各自的 堆, 最优节点表(状态 -> 节点), 闭集合
+    frontiers = ([], [])
+    best = ({root.state: root}, {goal.state: goal})
+    closed = (set(), set())
+    counter = 0 # 堆中的次序, 避免比较节点
+    for d, start in enumerate((root, goal)):
+        heapq.heappush(frontiers[d], (priorities[d](start), counter, start))
+        counter += 1
+
+    upper = float('inf') # 目前找到的最短路径代价
+    meeting = root.state if root.state == goal.state else None
+    if meeting is not None:
+        upper = 0
+
+    while frontiers[0] and frontiers[1]:
+        for d in (0, 1): # 丢弃过期的堆顶
+            heap = frontiers[d]
+            while heap and (heap[0][2].state in closed[d] or best[d][heap[0][2].state] is not heap[0][2]):
+                heapq.heappop(heap)
+        if not frontiers[0] or not frontiers[1]:
+            break
+        if upper <= max(frontiers[0][0][0], frontiers[1][0][0]):
+            break
+
+        d = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        _, _, node = heapq.heappop(frontiers[d])
+        closed[d].add(node.state)
+        if stats is None:
+            childrens = node.generate_children()
+        else:
+            childrens = stats.expand(node)
+            stats.observe(len(frontiers[0]) + len(frontiers[1]), len(closed[0]) + len(closed[1]))
+        for children in childrens:
+            known = best[d].get(children.state)
+            if known is not None and known.g <= children.g:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            best[d][children.state] = children
+            if children.state in closed[d]:
+                closed[d].remove(children.state)
+                if stats is not None:
+                    stats.reopened += 1
+            heapq.heappush(frontiers[d], (priorities[d](children), counter, children))
+            counter += 1
+            other = best[1 - d].get(children.state)
+            if other is not None and children.g + other.g < upper:
+                upper = children.g + other.g
+                meeting = children.state
+
+    if meeting is None:
+        return []
+    path = best[0][meeting].get_path()
+    p = best[1][meeting].parent
+    while p:
+        _extend_path(path, p.state)
+        p = p.parent
+    return path
+
+
+def _extend_path(path, state):
+    """Appends to `path` the child of its last node that has the given state, in place.
+
+    The child is generated from the last node, so the returned path keeps
+    correct `parent` links and `g` values.
+    """
+    for children in path[-1].generate_children():
+        if children.state == state:
+            path.append(children)
+            return
+    raise ValueError('state {} is not a successor of the last node of the path'.format(state))
+
+
+@instrumented
+def BucketAstar(root, stats=None):
+    """Runs the A* algorithm with a bucketed open list and lazy decrease-key.
+
+    The open list is a `BucketQueue`, which pops the node with the lowest f and
+    breaks ties toward higher g. When a cheaper path to a state that is already
+    open or closed is found, the cheaper node is pushed again and the old entry
+    is discarded when it is popped, so states are reopened as needed and the
+    solution stays optimal on problems with varying costs such as Superqueens.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search. Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node.
+            If there is no solution it returns an empty list, like `Astar`.
+    """
+    OPEN = BucketQueue()
+    OPEN.push(root)
+    push, pop = _queue_ops(OPEN.push, OPEN.pop, stats)
+    best_g = {root.state: root.g} # 状态 -> 目前已知的最小代价
+    while len(OPEN) > 0:
+        node = pop()
+        if node.g > best_g[node.state]: # 过期的节点, 已经有更短的路径
+            continue
+        if node.is_goal():
+            return node.get_path()
+        successors, make_child = _successors(node, stats)
+        if stats is not None:
+            stats.observe(len(OPEN), len(best_g))
+        for state, step_cost, move in successors:
+            g = node.g + step_cost
+            known = best_g.get(state)
+            if known is None or g < known:
+                best_g[state] = g
+                push(make_child(state, step_cost, move))
+                if known is not None and stats is not None:
+                    stats.reopened += 1
+            elif stats is not None:
+                stats.duplicates += 1
+    return []
+
+
+@instrumented
+def AnytimeAstar(root, weight=3.0, decrement=0.5, time_limit=None, max_expansions=None,
+                 on_solution=None, stats=None):
+    """Runs anytime repairing A* (ARA*) given the root node.
+
+    The search starts as weighted A*, ordering nodes by g + weight * h, which
+    finds a first solution quickly. The weight is then lowered by `decrement`
+    after every search, down to 1, and each new search reuses the nodes and the
+    g values of the previous ones: only the states whose g improved are put back
+    in the open list. The search stops once the weight reached 1 and the last
+    search finished (the solution is then optimal), or when the budget runs out.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    weight: int or float, optional
+        The initial weight of the heuristic, at least 1. Default is 3.0.
+
+    decrement: int or float, optional
+        How much the weight is lowered after every search. Default is 0.5.
+
+    time_limit: float, optional
+        The wall-clock budget in seconds. Default is None (no limit).
+
+    max_expansions: int, optional
+        The budget in expansions. Default is None (no limit).
+
+    on_solution: callable, optional
+        Called as on_solution(path, bound) as soon as every solution is found. Default is None.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search. Default is None.
+
+    Returns
+    -------
+        solutions: list of pairs (path, bound)
+            The solutions found, each cheaper than the previous one. `path` is a list of
+            Nodes as returned by `Astar` and `bound` the proven suboptimality bound: the
+            cost of `path` is at most `bound` times the optimal cost (for admissible
+            heuristics). The list is empty if no solution was found within the budget.
+    """
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    best = {root.state: root} # 状态 -> 目前代价最小的节点
+    OPEN = []
+    closed = set()
+    incons = {} # 在本轮已关闭后又找到更短路径的节点
+    counter = 0
+    expansions = 0
+    incumbent = root if root.is_goal() else None
+    solutions = []
+
+    def push(node):
+        nonlocal counter
+        heapq.heappush(OPEN, (node.g + weight * (node.f - node.g), -node.g, counter, node))
+        counter += 1
+
+    def publish(bound):
+        if solutions and solutions[-1][0][-1].g <= incumbent.g and solutions[-1][1] <= bound:
+            return
+        path = incumbent.get_path()
+        solutions.append((path, bound))
+        if on_solution is not None:
+            on_solution(path, bound)
+
+    def lower_bound():
+        fs = [node.f for _, _, _, node in OPEN if best[node.state] is node]
+        fs.extend(node.f for node in incons.values())
+        return min(fs) if fs else None
+
+    push(root)
+    while True:
+        finished = True # 本轮搜索是否完成 (未超出预算)
+        while OPEN:
+            node = OPEN[0][3]
+            if best[node.state] is not node or node.state in closed: # 过期的节点
+                heapq.heappop(OPEN)
+                continue
+            if incumbent is not None and incumbent.g <= OPEN[0][0]:
+                break
+            if (max_expansions is not None and expansions >= max_expansions) or \
+                    (deadline is not None and time.perf_counter() >= deadline):
+                finished = False
+                break
+            heapq.heappop(OPEN)
+            closed.add(node.state)
+            expansions += 1
+            if stats is None:
+                childrens = node.generate_children()
+            else:
+                childrens = stats.expand(node)
+                stats.observe(len(OPEN), len(closed))
+            for children in childrens:
+                known = best.get(children.state)
+                if known is not None and known.g <= children.g:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+                best[children.state] = children
+                if children.is_goal() and (incumbent is None or children.g < incumbent.g):
+                    incumbent = children
+                if children.state in closed:
+                    incons[children.state] = children
+                else:
+                    push(children)
+
+        if incumbent is not None:
+            f_min = lower_bound()
+            if f_min is None or f_min >= incumbent.g:
+                bound = 1
+            else:
+                bound = incumbent.g / f_min if f_min > 0 else float('inf')
+                if finished:
+                    bound = min(weight, bound)
+            publish(bound)
+            if finished and bound == 1:
+                break
+        if not finished or weight <= 1:
+            break
+        weight = max(1, weight - decrement)
+        # 把 INCONS 移回 OPEN, 并以新的权重重新排序
+        nodes = [n for _, _, _, n in OPEN if best[n.state] is n and n.state not in closed]
+        nodes.extend(incons.values())
+        OPEN = []
+        incons = {}
+        closed = set()
+        for n in nodes:
+            push(n)
+    return solutions
+
+
+@instrumented
+def BeamSearch(root, width=100, max_seen=1000000, max_depth=None, stats=None):
+    """Runs beam search given the root node.
+
+    The search goes depth by depth and keeps only the `width` nodes with the
+    lowest f of every depth, so it uses bounded memory and finds a solution
+    quickly, but the solution is not necessarily optimal and may be missed.
+    States are deduplicated with a table of at most `max_seen` states, which
+    forgets the oldest states first.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    width: int, optional
+        The number of nodes kept at every depth. Default is 100.
+
+    max_seen: int, optional
+        The number of states remembered for duplicate detection. Default is 1000000.
+
+    max_depth: int, optional
+        The depth at which the search gives up. Default is None (no limit).
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search. Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node.
+            If no solution was found it returns an empty list, like `Astar`.
+    """
+    if root.is_goal():
+        return [root]
+    seen = OrderedDict([(root.state, None)]) # 有界的去重表, 先进先出
+    beam = [root]
+    depth = 0
+    while beam and (max_depth is None or depth < max_depth):
+        candidates = []
+        for node in beam:
+            if stats is None:
+                childrens = node.generate_children()
+            else:
+                childrens = stats.expand(node)
+                stats.observe(len(beam), len(seen))
+            for children in childrens:
+                if children.state in seen:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+                seen[children.state] = None
+                if len(seen) > max_seen:
+                    seen.popitem(last=False)
+                candidates.append(children)
+        goals = [children for children in candidates if children.is_goal()]
+        if goals:
+            return min(goals, key=lambda n: n.g).get_path()
+        beam = heapq.nsmallest(width, candidates)
+        depth += 1
+    return []
+
+
+@instrumented
+def PredecessorAstar(root, stats=None):
+    """Runs the A* algorithm keeping only a predecessor table for the closed states.
+
+    `Astar` keeps every generated node alive through the `parent` links of the
+    nodes in the open list. This engine cuts these links: the open list holds
+    the frontier nodes together with the state of their parent, and a closed
+    state is only remembered as `state -> (parent_state, g)`. The solution path
+    is rebuilt from the table at the end, by regenerating the nodes along it
+    from the root, so it is returned in the same format as `Astar`.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search. Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node.
+            If there is no solution it returns an empty list, like `Astar`.
+    """
+    OPEN = [(root.f, -root.g, 0, root, None)] # 堆: (f, -g, 次序, 节点, 父状态)
+    open_g = {root.state: root.g} # open 中的状态 -> g
+    closed = {} # 状态 -> (父状态, g)
+    return _predecessor_search(root, OPEN, open_g, closed, stats)
+
+
+def _predecessor_search(root, OPEN, open_g, closed, stats, on_push=None, on_close=None):
+    """Runs the loop of `PredecessorAstar` from the given open list, open g values and closed table.
+
+    `on_push(state, g, parent_state)` is called for every node put in the open list and
+    `on_close(state)` for every state closed, before it is expanded; `CheckpointedAstar`
+    records them.
+    """
+    counter = len(OPEN)
+    push, pop = _queue_ops(heapq.heappush, heapq.heappop, stats)
+    while OPEN:
+        _, _, _, node, parent_state = pop(OPEN)
+        if node.state in closed or open_g.get(node.state) != node.g: # 过期的节点
+            continue
+        if on_close is not None:
+            on_close(node.state)
+        del open_g[node.state]
+        closed[node.state] = (parent_state, node.g)
+        if node.is_goal():
+            states = []
+            state = node.state
+            while state is not None:
+                states.append(state)
+                state = closed[state][0]
+            path = [root]
+            for state in reversed(states[:-1]):
+                _extend_path(path, state)
+            return path
+        if stats is None:
+            childrens = node.generate_children()
+        else:
+            childrens = stats.expand(node)
+            stats.observe(len(OPEN), len(closed))
+        for children in childrens:
+            if children.state in closed or open_g.get(children.state, float('inf')) <= children.g:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            children.parent = None # 父节点只记录在表中
+            open_g[children.state] = children.g
+            push(OPEN, (children.f, -children.g, counter, children, node.state))
+            if on_push is not None:
+                on_push(children.state, children.g, node.state)
+            counter += 1
+    return []
+
+
+@instrumented
+def SMAstar(root, max_nodes=100000, max_bytes=None, stats=None):
+    """Runs simplified memory-bounded A* (SMA*) given the root node.
+
+    The search tree is kept in memory, at most `max_nodes` nodes. Every node
+    carries a lower bound of the cost of the solutions below it, backed up from
+    its children. The leaf with the lowest bound is expanded; when the tree grows
+    over the budget, the leaf with the highest bound (the shallowest one among
+    equals) is pruned, and its bound is remembered by its parent. A parent whose
+    forgotten bound becomes the lowest one is expanded again and regenerates the
+    pruned children, which start from that bound. The solution is optimal as
+    long as the budget can hold it: a node whose depth reaches the budget is
+    given up.
+
+    The heaps only hold the numbers of the entries, so a pruned node is freed at
+    once, and a heap is rebuilt when its stale records outnumber the nodes. The
+    tree may go over the budget by the children of one expansion, until the
+    pruning that follows it.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    max_nodes: int, optional
+        The largest number of nodes in memory. Default is 100000.
+
+    max_bytes: int, optional
+        A budget in bytes instead, turned into a number of nodes by measuring the root node
+        and its bookkeeping, heap records included (see `_MemoryEntry.nbytes`). Default is None.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search; `peak_open` is the largest
+        number of nodes in memory, before the pruning, and `pruned` the number of nodes pruned.
+        Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node.
+            If there is no solution within the budget it returns an empty list, like `Astar`.
+    """
+    inf = float('inf')
+    top = _MemoryEntry(root, None, 0, root.f, 0)
+    if max_bytes is not None:
+        max_nodes = max(2, max_bytes // top.nbytes())
+    entries = {0: top} # 编号 -> 内存中的节点; 堆里只存编号, 剪掉的节点随即释放
+    best = [(top.forgotten, 0, 0)] # 堆: (遗忘的下界, -深度, 编号), 下界最小的先扩展
+    worst = [] # 堆: (-下界, 深度, 编号), 下界最大且最浅的叶节点先剪枝
+    number = 1
+    while best:
+        bound, _, key = heapq.heappop(best)
+        entry = entries.get(key)
+        if entry is None or entry.forgotten != bound: # 过期的记录
+            continue
+        if bound == inf:
+            return []
+        node = entry.node
+        if node.is_goal():
+            return node.get_path()
+        entry.forgotten = inf
+        known = {children.node.state for children in entry.children}
+        ancestors = set()
+        p = entry
+        while p is not None:
+            ancestors.add(p.node.state)
+            p = p.parent
+        if stats is None:
+            childrens = node.generate_children()
+        else:
+            childrens = stats.expand(node)
+        for children in childrens:
+            if children.state in known or children.state in ancestors: # 已在内存中, 或者会形成环路
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            f = max(children.f, bound) # 被遗忘的子节点的下界不小于父节点记住的下界
+            if entry.depth + 2 >= max_nodes and not children.is_goal(): # 内存放不下更深的路径
+                f = inf
+            added = _MemoryEntry(children, entry, entry.depth + 1, f, number)
+            entry.children.append(added)
+            entries[number] = added
+            heapq.heappush(best, (f, -added.depth, number))
+            heapq.heappush(worst, (-f, added.depth, number))
+            number += 1
+        p = entry
+        while p is not None: # 向上回传下界
+            value = min([p.forgotten] + [children.value for children in p.children])
+            if value == p.value and p is not entry:
+                break
+            p.value = value
+            if not p.children:
+                heapq.heappush(worst, (-value, p.depth, p.number))
+            p = p.parent
+        if stats is not None:
+            stats.observe(len(entries))
+        while len(entries) > max_nodes and worst: # 超出预算, 剪掉最差的叶节点
+            key, _, leaf = heapq.heappop(worst)
+            leaf = entries.get(leaf)
+            if leaf is None or leaf.children or leaf is top or -key != leaf.value:
+                continue
+            del entries[leaf.number]
+            parent = leaf.parent
+            parent.children.remove(leaf)
+            parent.forgotten = min(parent.forgotten, leaf.value)
+            heapq.heappush(best, (parent.forgotten, -parent.depth, parent.number))
+            if not parent.children:
+                heapq.heappush(worst, (-parent.value, parent.depth, parent.number))
+            if stats is not None:
+                stats.pruned += 1
+        if len(best) > 2 * len(entries) + 16: # 过期的记录多于有效的记录时重建堆
+            best = [(e.forgotten, -e.depth, e.number) for e in entries.values() if e.forgotten < inf]
+            heapq.heapify(best)
+        if len(worst) > 2 * len(entries) + 16:
+            worst = [(-e.value, e.depth, e.number) for e in entries.values() if not e.children and e is not top]
+            heapq.heapify(worst)
+    return []
+
+
+class _MemoryEntry:
+    """A node of the search tree of `SMAstar`.
+
+    Attributes
+    ----------
+    children : list of _MemoryEntry
+        The children in memory.
+
+    forgotten : int or float
+        The lowest bound of the children not in memory: all of them before the first expansion,
+        the pruned ones after. Infinite when there is none.
+
+    value : int or float
+        The lowest bound below this node, min(forgotten, value of the children).
+
+    number : int
+        The key of this entry in the table of the entries in memory, the one stored in the heaps.
+    """
+    __slots__ = ('node', 'parent', 'depth', 'children', 'forgotten', 'value', 'number')
+
+    def __init__(self, node, parent, depth, f, number):
+        self.node = node
+        self.parent = parent
+        self.depth = depth
+        self.children = []
+        self.forgotten = f
+        self.value = f
+        self.number = number
+
+    def nbytes(self):
+        """Estimates the bytes of one node in memory: this entry, its node, its state, its list of children,
+        its slot in the table of entries and its records in the two heaps (up to twice as many records as
+        nodes are kept before a heap is rebuilt)."""
+        state = self.node.state
+        size = sys.getsizeof(self) + sys.getsizeof(self.node) + sys.getsizeof(self.children) + sys.getsizeof(state)
+        if isinstance(state, tuple):
+            size += sum(sys.getsizeof(x) for x in state if isinstance(x, tuple))
+        size += 3 * 8 + sys.getsizeof(2 ** 40) # 表: 哈希, 键和值, 以及编号
+        size += 4 * (sys.getsizeof((0, 0, 0)) + 8) # 两个堆, 每个节点最多两条记录
+        return size
+
+
+# 按名称选择搜索算法, 供批量求解等入口使用
+ENGINES = {
+    'astar': Astar,
+    'idastar': IDAstar,
+    'bucket': BucketAstar,
+    'beam': BeamSearch,
+    'predecessor': PredecessorAstar,
+    'sma': SMAstar,
+}
+
+# 解总是最优的搜索算法 (启发函数可采纳时). Astar 不更新 open 中状态的代价, SMAstar 受内存预算限制, 都不在其中
+OPTIMAL_ENGINES = {IDAstar, BucketAstar, PredecessorAstar}
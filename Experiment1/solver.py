@@ -0,0 +1,218 @@
+"""Front door of the 15 puzzle solver.
+
+Before any search runs, `solve` does the following:
+
+* rejects the boards that cannot reach the goal (wrong permutation parity) in O(16);
+* maps the board to its canonical form under the reflection about the main
+  diagonal, which maps the goal onto itself, so a board and its mirror image
+  share one entry of the cache;
+* answers from a persistent on-disk cache of solutions (an sqlite file). Every
+  solution is stored with whether the engine that found it is optimal, and an
+  optimal engine is only answered with optimal solutions.
+
+Other problems are passed straight to the search engine.
+
+"""
+import json
+import sqlite3
+
+from problems import FifteensNode
+from search import Astar, OPTIMAL_ENGINES
+
+# 关于主对角线对称: 位置 (i, j) -> (j, i)
+_REFLECTED_CELL = [4 * (k % 4) + k // 4 for k in range(16)]
+# 方块编号也按目标位置对称, 这样目标状态保持不变
+_REFLECTED_TILE = [0] + [_REFLECTED_CELL[tile - 1] + 1 for tile in range(1, 16)]
+_REFLECTED_MOVE = {'U': 'L', 'L': 'U', 'D': 'R', 'R': 'D'}
+
+
+def is_solvable(board):
+    """Decides whether a 15 puzzle board can reach the goal, in O(16) time.
+
+    A move swaps the empty cell with a neighbour, so it flips the parity of the
+    permutation of the board and of the distance of the empty cell to its goal
+    cell. The board is solvable iff both parities agree.
+
+    Parameters
+    ----------
+    board : tuple
+        The 16 values of the board in row-major order, as in `FifteensNode.board`.
+
+    Returns
+    -------
+        solvable : bool
+            True if the goal can be reached from this board, False otherwise.
+
+    Raises
+    ------
+    ValueError
+        If the board is not a permutation of 0, ..., 15.
+    """
+    if sorted(board) != list(range(16)):
+        raise ValueError('a 15 puzzle board must hold each of 0, ..., 15 once')
+    # 目标状态中数字 num 位于 num - 1 (空格位于 15); 通过分解置换的环计算奇偶性
+    goal_cell = [15] + list(range(15))
+    seen = [False] * 16
+    transpositions = 0
+    for k in range(16):
+        length = 0
+        while not seen[k]:
+            seen[k] = True
+            k = goal_cell[board[k]]
+            length += 1
+        if length:
+            transpositions += length - 1
+    blank = board.index(0)
+    blank_distance = (3 - blank // 4) + (3 - blank % 4)
+    return transpositions % 2 == blank_distance % 2
+
+
+def reflect(board):
+    """Returns the mirror image of a flat board about the main diagonal."""
+    reflected = [0] * 16
+    for k, num in enumerate(board):
+        reflected[_REFLECTED_CELL[k]] = _REFLECTED_TILE[num]
+    return tuple(reflected)
+
+
+def canonicalize(board):
+    """Returns the canonical form of a flat board and whether it is the mirror image of the board."""
+    reflected = reflect(board)
+    if reflected < tuple(board):
+        return reflected, True
+    return tuple(board), False
+
+
+def apply_moves(root, moves):
+    """Replays moves from a root node.
+
+    Parameters
+    ----------
+    root : Node
+        The start node.
+
+    moves : list
+        The moves, as returned by `get_move`.
+
+    Returns
+    -------
+        path : list of Nodes
+            The path from the root node following the moves, as returned by `Astar`.
+    """
+    path = [root]
+    for move in moves:
+        for children in path[-1].generate_children():
+            if children.get_move() == move:
+                path.append(children)
+                break
+        else:
+            raise ValueError('{!r} is not a legal move'.format(move))
+    return path
+
+
+class SolutionCache:
+    """Persistent cache of 15 puzzle solutions stored in an sqlite file.
+
+    The solutions are stored as the list of moves of the empty cell, keyed by
+    the canonical board (see `canonicalize`), together with whether they are
+    known to be optimal. A non-optimal solution never replaces an optimal one.
+
+    Parameters
+    ----------
+    path : str
+        The sqlite file. It is created if it does not exist.
+
+    Examples
+    ----------
+    >>> cache = SolutionCache('solutions.sqlite')
+    >>> path = solve(root, cache=cache)
+    """
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS solutions '
+                                 '(board TEXT PRIMARY KEY, moves TEXT NOT NULL, optimal INTEGER NOT NULL DEFAULT 0)')
+        columns = [row[1] for row in self._connection.execute('PRAGMA table_info(solutions)')]
+        if 'optimal' not in columns: # 旧版本的缓存文件, 其中的解不一定最优
+            self._connection.execute('ALTER TABLE solutions ADD COLUMN optimal INTEGER NOT NULL DEFAULT 0')
+        self._connection.commit()
+
+    def get(self, board, optimal=False):
+        """Returns the moves solving a canonical board, or None if it is not cached
+        (or, if `optimal` is True, if the cached moves are not known to be optimal)."""
+        row = self._connection.execute('SELECT moves, optimal FROM solutions WHERE board = ?', (_key(board),)).fetchone()
+        if row is None or (optimal and not row[1]):
+            return None
+        return json.loads(row[0])
+
+    def put(self, board, moves, optimal=False):
+        """Stores the moves solving a canonical board, unless an optimal solution is already stored."""
+        with self._connection:
+            self._connection.execute('INSERT INTO solutions VALUES (?, ?, ?) ON CONFLICT(board) DO UPDATE '
+                                     'SET moves = excluded.moves, optimal = excluded.optimal '
+                                     'WHERE excluded.optimal >= solutions.optimal',
+                                     (_key(board), json.dumps(moves), int(optimal)))
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+def _key(board):
+    return ' '.join(str(num) for num in board)
+
+
+def solve(root, engine=Astar, cache=None, optimal=None, **kwargs):
+    """Solves a problem, checking first whether a 15 puzzle is solvable or already solved.
+
+    Parameters
+    ----------
+    root : Node
+        The start node of the problem to be solved.
+
+    engine : callable, optional
+        The search algorithm, e.g. a function of `search.ENGINES`. Default is `Astar`.
+
+    cache : SolutionCache, optional
+        The cache of solutions of 15 puzzles. Default is None.
+
+    optimal : bool, optional
+        Whether the solutions of the engine are optimal. An optimal engine is only answered
+        from the cache with optimal solutions, and its solutions are stored as optimal.
+        Default is None, True for the engines of `search.OPTIMAL_ENGINES`.
+
+    **kwargs
+        Passed to the engine, e.g. `stats`.
+
+    Returns
+    -------
+        path : list of Nodes
+            The solution, a path from the initial node to the goal node, as returned by `Astar`.
+            It is an empty list right away if the board is not solvable.
+
+    Raises
+    ------
+    ValueError
+        If a 15 puzzle board is not a permutation of 0, ..., 15.
+    """
+    if not isinstance(root, FifteensNode):
+        return engine(root, **kwargs)
+    if not is_solvable(root.board):
+        return []
+    board, reflected = canonicalize(root.board)
+    if optimal is None:
+        optimal = engine in OPTIMAL_ENGINES
+    if cache is not None:
+        moves = cache.get(board, optimal)
+        if moves is not None:
+            if reflected:
+                moves = [_REFLECTED_MOVE[move] for move in moves]
+            return apply_moves(root, moves)
+    path = engine(root, **kwargs)
+    if cache is not None and path:
+        moves = [node.get_move() for node in path[1:]]
+        if reflected:
+            moves = [_REFLECTED_MOVE[move] for move in moves]
+        cache.put(board, moves, optimal)
+    return path
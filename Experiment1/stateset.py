@@ -0,0 +1,176 @@
+"""Compact set of 64-bit states backed by a NumPy array.
+
+`StateSet` stores packed states (see `problems.pack_board`) in an open-addressing
+hash table of `uint64` with linear probing, i.e. 8 bytes per slot, where a
+Python `set` of tuples costs well over 100 bytes per state.
+
+It is a memory saving, not a speed-up, for one state at a time: every probe
+runs in Python, so `add` and `in` are several times slower than those of a
+`set` (about 5x on 100k lookups), and `Astar` is about 10% slower with it. The
+batch methods `contains` and `update` probe arrays of keys with NumPy, all
+keys at once, and are the fast path for code that handles states in arrays.
+
+"""
+import numpy as np
+
+_EMPTY = 0 # 空槽位; 合法的压缩状态不会是 0
+_MULTIPLIER = 0x9E3779B97F4A7C15 # 斐波那契散列
+_MASK64 = (1 << 64) - 1
+
+
+class StateSet:
+    """Set of non-zero 64-bit integer states stored in an open-addressing hash table.
+
+    It supports the operations the search engines use on their `open_set` and
+    `close_set`, so it can be passed to `Astar(root, state_set=StateSet)`, and
+    the batch operations `contains` and `update` on arrays of states.
+
+    Parameters
+    ----------
+    capacity : int, optional
+        The expected number of states. The table grows when it gets half full. Default is 1024.
+
+    Examples
+    ----------
+    >>> states = StateSet()
+    >>> states.add(pack_board(board))
+    >>> pack_board(board) in states
+    True
+    """
+    def __init__(self, capacity=1024):
+        bits = 4
+        while (1 << bits) < 2 * capacity:
+            bits += 1
+        self._allocate(bits)
+
+    def _allocate(self, bits):
+        self._bits = bits
+        self._shift = 64 - bits
+        self._mask = (1 << bits) - 1
+        self._table = np.zeros(1 << bits, dtype=np.uint64)
+        self._slots = memoryview(self._table) # 逐个读写时返回 Python 整数, 比 NumPy 标量快
+        self._size = 0
+
+    def _slot(self, key):
+        """Returns the home slot of a key."""
+        return ((key * _MULTIPLIER) & _MASK64) >> self._shift
+
+    def _find(self, key):
+        """Returns the slot holding `key`, or the empty slot where it would be inserted."""
+        slots = self._slots
+        mask = self._mask
+        i = ((key * _MULTIPLIER) & _MASK64) >> self._shift
+        while True:
+            k = slots[i]
+            if k == key or k == _EMPTY:
+                return i
+            i = (i + 1) & mask
+
+    def _find_all(self, keys):
+        """Returns the slots holding an array of keys, or the empty slots where they would be inserted.
+
+        All the keys advance one probe at a time together, until each has met itself or an empty slot.
+        """
+        table = self._table
+        slots = (keys * np.uint64(_MULTIPLIER)) >> np.uint64(self._shift) # uint64 的乘法按 2^64 取模
+        pending = np.arange(len(keys))
+        while len(pending):
+            found = table[slots[pending]]
+            done = (found == keys[pending]) | (found == _EMPTY)
+            pending = pending[~done]
+            slots[pending] = (slots[pending] + np.uint64(1)) & np.uint64(self._mask)
+        return slots
+
+    def add(self, key):
+        """Adds a state to the set.
+
+        Raises
+        ------
+        ValueError
+            If the state is 0, which marks the empty slots.
+        """
+        if key == _EMPTY:
+            raise ValueError('the state 0 cannot be stored in a StateSet')
+        i = self._find(key)
+        if self._slots[i] == _EMPTY:
+            self._slots[i] = key
+            self._size += 1
+            if 2 * self._size > len(self._table):
+                self._grow()
+
+    def update(self, keys):
+        """Adds an array of states to the set, probing for all of them at once with NumPy.
+
+        Raises
+        ------
+        ValueError
+            If one of the states is 0, which marks the empty slots.
+        """
+        keys = np.unique(np.asarray(keys, dtype=np.uint64))
+        if len(keys) and keys[0] == _EMPTY:
+            raise ValueError('the state 0 cannot be stored in a StateSet')
+        while 2 * (self._size + len(keys)) > len(self._table): # 先扩容, 插入时不再移动
+            self._grow()
+        self._insert_all(keys)
+
+    def _insert_all(self, keys):
+        """Inserts an array of distinct non-zero keys, skipping those already present; the table must be large enough."""
+        while len(keys):
+            slots = self._find_all(keys)
+            new = self._table[slots] == _EMPTY
+            keys, slots = keys[new], slots[new]
+            first = np.unique(slots, return_index=True)[1] # 同一个空槽位只放第一个键, 其余的重新探测
+            self._table[slots[first]] = keys[first]
+            self._size += len(first)
+            keys = np.delete(keys, first)
+
+    def contains(self, keys):
+        """Returns an array of booleans telling which states of an array are in the set, probed all at once."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        return (self._table[self._find_all(keys)] != _EMPTY) & (keys != _EMPTY)
+
+    def remove(self, key):
+        """Removes a state from the set, raising KeyError if it is not present."""
+        table = self._slots
+        mask = self._mask
+        i = self._find(key)
+        if key == _EMPTY or table[i] == _EMPTY:
+            raise KeyError(key)
+        # 删除后把同一探测序列中的后续元素向前移动, 不需要墓碑标记
+        table[i] = _EMPTY
+        j = i
+        while True:
+            j = (j + 1) & mask
+            k = table[j]
+            if k == _EMPTY:
+                break
+            home = self._slot(k)
+            if (i < j and (home <= i or home > j)) or (i > j and home <= i and home > j):
+                table[i] = k
+                table[j] = _EMPTY
+                i = j
+        self._size -= 1
+
+    def discard(self, key):
+        """Removes a state from the set if it is present."""
+        if key in self:
+            self.remove(key)
+
+    def _grow(self):
+        keys = self._table[self._table != _EMPTY]
+        self._allocate(self._bits + 1)
+        self._insert_all(keys)
+
+    def __contains__(self, key):
+        return key != _EMPTY and self._slots[self._find(key)] != _EMPTY
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self._table[self._table != _EMPTY].tolist())
+
+    @property
+    def nbytes(self):
+        """The number of bytes used by the hash table."""
+        return self._table.nbytes
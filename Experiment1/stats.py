@@ -0,0 +1,266 @@
+"""Counters, timers and hooks collected by the search engines.
+
+Every engine in `search` accepts an optional `stats` argument. When it is None
+(the default) the engine does no bookkeeping at all; otherwise the engine
+reports every expansion to the `SearchStats` object, which keeps the counters,
+optionally times the phases of the search and calls the user's hooks.
+
+"""
+import functools
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+
+class SearchStats:
+    """Counters, timers and hooks of one search.
+
+    Parameters
+    ----------
+    timing : bool, optional
+        Whether to time the phases of the search. It costs two clock reads per
+        expansion, per heuristic evaluation and per operation of the open list.
+        Default is False.
+
+    on_expand : callable, optional
+        Called as on_expand(node, children) after every expansion. Default is None.
+        The engines that use the successor protocol pass the (state, step_cost, move)
+        tuples of the successors instead of the child nodes.
+
+    on_progress : callable, optional
+        Called as on_progress(stats) every `progress_every` expansions. Default is None.
+
+    progress_every : int, optional
+        The number of expansions between two calls of on_progress. Default is 10000.
+
+    Attributes
+    ----------
+    expanded : int
+        The number of nodes whose children were generated.
+
+    generated : int
+        The number of child nodes generated.
+
+    duplicates : int
+        The number of generated nodes dropped because their state was already known.
+        With the successor protocol they are dropped before being constructed.
+
+    reopened : int
+        The number of states put back in the open list after a cheaper path was found.
+
+    pruned : int
+        The number of nodes dropped to stay within a memory budget (SMA*).
+
+    peak_open : int
+        The largest size of the open list (the current path for IDA*, the whole tree for SMA*).
+
+    peak_closed : int
+        The largest size of the closed set.
+
+    timers : dict
+        The seconds spent in each phase when `timing` is on, which add up to `elapsed`:
+        'generate' (generating the children or successors, without their heuristic),
+        'heuristic' (evaluate_heuristic, wherever it is called), 'queue' (the pushes and pops
+        of the open list, in the engines that time them with `timed`: `Astar`, `BucketAstar`
+        and `PredecessorAstar`) and 'other' (the closed set, goal tests and the rest).
+
+    elapsed : float
+        The wall time of the search in seconds.
+
+    peak_memory : int
+        The peak resident memory of the process in bytes, read when the search ends
+        (on Linux, of the current program, not counting the parent it was forked from).
+
+    Examples
+    ----------
+    >>> stats = SearchStats(timing=True)
+    >>> path = Astar(root, stats=stats)
+    >>> print(stats.expanded, stats.expansions_per_second, stats.timers)
+    """
+    def __init__(self, timing=False, on_expand=None, on_progress=None, progress_every=10000):
+        self.timing = timing
+        self.on_expand = on_expand
+        self.on_progress = on_progress
+        self.progress_every = progress_every
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.reopened = 0
+        self.pruned = 0
+        self.peak_open = 0
+        self.peak_closed = 0
+        self.timers = {'generate': 0.0, 'heuristic': 0.0, 'queue': 0.0, 'other': 0.0}
+        self.elapsed = 0.0
+        self.peak_memory = 0
+        self._started = None
+
+    def expand(self, node):
+        """Generates the children of a node on behalf of an engine and records the expansion.
+
+        Returns
+        -------
+            children : list of Nodes
+                The result of node.generate_children().
+        """
+        if self.timing:
+            start = time.perf_counter()
+            heuristic = self.timers['heuristic']
+            children = node.generate_children()
+            self.timers['generate'] += time.perf_counter() - start - (self.timers['heuristic'] - heuristic)
+        else:
+            children = node.generate_children()
+        self._record(node, children)
+        return children
+
+    def successors(self, node):
+        """Like `expand`, for the engines that use the successor protocol of the nodes.
+        The children are only constructed later, by `make_child`: the heuristic of the kept
+        ones is timed as 'heuristic' and the rest of their construction as 'other'.
+
+        Returns
+        -------
+            successors : list of tuples
+                The (state, step_cost, move) tuples yielded by node.successors().
+        """
+        if self.timing:
+            start = time.perf_counter()
+            successors = list(node.successors())
+            self.timers['generate'] += time.perf_counter() - start
+        else:
+            successors = list(node.successors())
+        self._record(node, successors)
+        return successors
+
+    def timed(self, phase, function):
+        """Returns `function` timed as `phase` in `timers` when `timing` is on, `function` itself otherwise.
+
+        Examples
+        ----------
+        >>> push = stats.timed('queue', heapq.heappush)
+        """
+        if not self.timing:
+            return function
+        timers = self.timers
+
+        @functools.wraps(function)
+        def timed_function(*args):
+            start = time.perf_counter()
+            result = function(*args)
+            timers[phase] += time.perf_counter() - start
+            return result
+        return timed_function
+
+    def expand_batch(self, expanded, generated):
+        """Records a batch of expansions made at once by a vectorized engine. `on_expand` is not called."""
+        before = self.expanded
+        self.expanded += expanded
+        self.generated += generated
+        if self.on_progress is not None and self.expanded // self.progress_every > before // self.progress_every:
+            self.on_progress(self)
+
+    def _record(self, node, children):
+        """Counts an expansion and calls the hooks."""
+        self.expanded += 1
+        self.generated += len(children)
+        if self.on_expand is not None:
+            self.on_expand(node, children)
+        if self.on_progress is not None and self.expanded % self.progress_every == 0:
+            self.on_progress(self)
+
+    def observe(self, open_size, closed_size=0):
+        """Records the current sizes of the open list and the closed set."""
+        if open_size > self.peak_open:
+            self.peak_open = open_size
+        if closed_size > self.peak_closed:
+            self.peak_closed = closed_size
+
+    @property
+    def expansions_per_second(self):
+        """The average number of expansions per second of wall time."""
+        elapsed = self.elapsed if self._started is None else time.perf_counter() - self._started
+        return self.expanded / elapsed if elapsed > 0 else 0.0
+
+    @contextmanager
+    def measure(self, node_class):
+        """Times a whole search and, when `timing` is on, the heuristic of `node_class`.
+
+        The heuristic is timed by wrapping `node_class.evaluate_heuristic` for the
+        duration of the search, so it should not be used by other threads meanwhile.
+        """
+        original = node_class.__dict__.get('evaluate_heuristic')
+        if self.timing:
+            heuristic = node_class.evaluate_heuristic
+            timers = self.timers
+
+            @functools.wraps(heuristic)
+            def timed_heuristic(node):
+                start = time.perf_counter()
+                h = heuristic(node)
+                timers['heuristic'] += time.perf_counter() - start
+                return h
+            node_class.evaluate_heuristic = timed_heuristic
+        self._started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.elapsed += time.perf_counter() - self._started
+            self._started = None
+            if self.timing:
+                if original is None:
+                    del node_class.evaluate_heuristic
+                else:
+                    node_class.evaluate_heuristic = original
+                timed = sum(t for phase, t in self.timers.items() if phase != 'other')
+                self.timers['other'] = max(0.0, self.elapsed - timed)
+            self.peak_memory = _peak_rss()
+
+    def as_dict(self):
+        """Returns the counters and timers as a dictionary, e.g. to be serialized as JSON."""
+        d = {
+            'expanded': self.expanded,
+            'generated': self.generated,
+            'duplicates': self.duplicates,
+            'reopened': self.reopened,
+            'pruned': self.pruned,
+            'peak_open': self.peak_open,
+            'peak_closed': self.peak_closed,
+            'elapsed': self.elapsed,
+            'expansions_per_second': self.expansions_per_second,
+            'peak_memory': self.peak_memory,
+        }
+        if self.timing:
+            d['timers'] = dict(self.timers)
+        return d
+
+
+def instrumented(engine):
+    """Decorator for search engines taking `(root, ..., stats=None)`.
+
+    When a `SearchStats` is passed, the whole search runs inside `stats.measure`;
+    otherwise the engine is called directly.
+    """
+    @functools.wraps(engine)
+    def run(root, *args, stats=None, **kwargs):
+        if stats is None:
+            return engine(root, *args, **kwargs)
+        with stats.measure(type(root)):
+            return engine(root, *args, stats=stats, **kwargs)
+    return run
+
+
+def _peak_rss():
+    """Returns the peak resident memory of this process in bytes.
+
+    On Linux it is VmHWM, the peak of the current program only: `ru_maxrss` keeps the peak
+    of the parent process across fork and exec, so a fresh worker would report it too.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024 # 单位为 kB
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024 # Linux 上单位为 KB
@@ -3,9 +3,33 @@ NOTE: Do not rely on these tests as they are just simple examples.
 Your code will be tested on some secret instances of the problems!
 """
 
+import asyncio
+import errno
+import json
+import os
+import shutil
+import signal
+import tempfile
+import time
 import unittest
-from problems import FifteensNode, SuperqueensNode
-from search import Astar
+from unittest import mock
+import numpy as np
+from problems import FifteensNode, SuperqueensNode, PackedFifteensNode, SlidingTileNode, pack_board, unpack_board, tile_tables
+from search import Astar, IDAstar, BidirectionalAstar, BucketAstar, AnytimeAstar, BeamSearch, PredecessorAstar, SMAstar
+from buckets import BucketQueue
+from parallel import ParallelAstar
+from batch import solve_instance, solve_batch, read_instances
+from checkpoint import CheckpointedAstar
+from perimeter import Perimeter, PerimeterNode, PerimeterAstar, build as build_perimeter, write as write_perimeter
+from portfolio import Configuration, solve_portfolio
+from benchmark import fifteens_instances, superqueens_instances, run_suite, compare
+from stats import SearchStats
+from stateset import StateSet
+from solver import SolutionCache, solve, is_solvable, reflect, canonicalize
+from asyncsearch import SearchPool, solve_async
+from external import ExternalAstar
+from vectorized import BatchAstar, SlidingTileBatch, batch_problem
+from patterndb import PatternDatabase, PatternDatabaseNode, build_all, rank, unrank, table_size
 
 
 class TestFifteens(unittest.TestCase):
@@ -31,6 +55,17 @@ class TestFifteens(unittest.TestCase):
         children = fifteens_root.generate_children()
         self.assertTrue(len(children) == 4)
 
+    def test_inverse_move_pruning(self):
+        """Test that children track the empty cell and never undo the move that produced their parent.
+        """
+        input_str = '1  2  3  4\n5  6  7  8\n9 10  0 11\n13 14 15 12'
+        fifteens_root = FifteensNode(input_str=input_str)
+        for child in fifteens_root.generate_children():
+            self.assertEqual(child.blank, child.board.index(0))
+            grandchildren = child.generate_children()
+            self.assertEqual(len(grandchildren), len(child.tables.moves[child.blank]) - 1)
+            self.assertNotIn(fifteens_root.state, [c.state for c in grandchildren])
+
     def test_heuristic_functions(self):
         """Test that evaluate_heuristic returns 0 when the state is the goal state.
         """
@@ -38,6 +73,28 @@ class TestFifteens(unittest.TestCase):
         fifteens_node = FifteensNode(input_str=final_str)
         self.assertEqual(fifteens_node.evaluate_heuristic(), 0)
 
+    def test_linear_conflicts(self):
+        """Test that the heuristic adds 2 moves for every tile that must leave its row or column.
+        """
+        swapped_str = '2  1  3  4\n5  6  7  8\n9 10 11 12\n13 14 15  0'
+        fifteens_node = FifteensNode(input_str=swapped_str)
+        self.assertEqual((fifteens_node.md, fifteens_node.lc), (2, 1))
+        self.assertEqual(fifteens_node.evaluate_heuristic(), 4)
+        reversed_str = '4  3  2  1\n5  6  7  8\n9 10 11 12\n13 14 15  0'
+        self.assertEqual(FifteensNode(input_str=reversed_str).evaluate_heuristic(), 8 + 2 * 3)
+
+    def test_incremental_heuristic(self):
+        """Test that the heuristic of a child, updated from its parent, matches a full evaluation
+        and never exceeds the length of the optimal solution.
+        """
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        fifteens_path = Astar(FifteensNode(input_str=input_str))
+        for node in fifteens_path:
+            for child in node.generate_children():
+                fresh = FifteensNode(board=child.board)
+                self.assertEqual((child.md, child.lc), (fresh.md, fresh.lc))
+            self.assertLessEqual(node.f, fifteens_path[-1].g)
+
     def test_a_star_algorithm(self):
         """Test that the length of the solution to a sample initial configuration is correct,
         and the last state is the goal.
@@ -48,6 +105,182 @@ class TestFifteens(unittest.TestCase):
         self.assertEqual(len(fifteens_path), 3)
         self.assertTrue(fifteens_path[-1].is_goal())
 
+    def test_packed_states(self):
+        """Test that the packed state of a board is a 64-bit integer that unpacks to the same board.
+        """
+        input_str = '1  2  3  4\n5  6  7  8\n9 10  0 11\n13 14 15 12'
+        packed_root = PackedFifteensNode(input_str=input_str)
+        self.assertLess(packed_root.state, 1 << 64)
+        self.assertEqual(unpack_board(packed_root.state), packed_root.board)
+        self.assertEqual(packed_root.state, pack_board(FifteensNode(input_str=input_str).board))
+        self.assertTrue(all(isinstance(c, PackedFifteensNode) for c in packed_root.generate_children()))
+        with mock.patch('problems.pack_board', side_effect=AssertionError('a child packed its board')):
+            childrens = packed_root.generate_children()
+        self.assertEqual([c.state for c in childrens], [pack_board(c.board) for c in childrens])
+
+    def test_successors(self):
+        """Test that the successors describe the children without constructing them, for tuple and packed states.
+        """
+        input_str = '1  2  3  4\n5  6  7  8\n9 10  0 11\n13 14 15 12'
+        for cls in (FifteensNode, PackedFifteensNode):
+            root = cls(input_str=input_str)
+            successors = list(root.successors())
+            childrens = root.generate_children()
+            self.assertEqual([state for state, _, _ in successors], [c.state for c in childrens])
+            self.assertEqual([move for _, _, move in successors], [c.get_move() for c in childrens])
+            self.assertTrue(all(step_cost == 1 for _, step_cost, _ in successors))
+            grandchild = childrens[0].make_child(*next(childrens[0].successors()))
+            self.assertEqual((grandchild.g, grandchild.f), (2, 2 + cls(board=grandchild.board).f))
+
+    def test_a_star_algorithm_packed(self):
+        """Test that A* over packed states and a StateSet finds a solution of the same length.
+        """
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        fifteens_path = Astar(PackedFifteensNode(input_str=input_str), state_set=StateSet)
+        self.assertEqual(len(fifteens_path), len(Astar(FifteensNode(input_str=input_str))))
+        self.assertTrue(fifteens_path[-1].is_goal())
+
+    def test_moves(self):
+        """Test that get_move returns the direction the empty cell moved along a solution.
+        """
+        input_str = '1  2  3  4\n5  6  7  8\n9 10  0 11\n13 14 15 12'
+        fifteens_path = Astar(FifteensNode(input_str=input_str))
+        self.assertEqual([node.get_move() for node in fifteens_path], [None, 'R', 'D'])
+
+    def test_ida_star_algorithm(self):
+        """Test that IDA* finds a solution of the same length as A*.
+        """
+        input_str = '1  2  3  4\n5  6  7  8\n9 10  0 11\n13 14 15 12'
+        fifteens_root = FifteensNode(input_str=input_str)
+        fifteens_path = IDAstar(fifteens_root)
+        self.assertEqual(len(fifteens_path), 3)
+        self.assertTrue(fifteens_path[-1].is_goal())
+        self.assertEqual(fifteens_path, fifteens_path[-1].get_path())
+
+    def test_bidirectional_a_star_algorithm(self):
+        """Test that bidirectional A* stitches an optimal path from the initial configuration to the goal.
+        """
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        final_str = "1  2  3  4\n5  6  7  8\n9 10 11 12\n13 14 15  0"
+        fifteens_root = FifteensNode(input_str=input_str)
+        fifteens_path = BidirectionalAstar(fifteens_root, FifteensNode(input_str=final_str))
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertTrue(fifteens_path[-1].is_goal())
+        self.assertEqual(fifteens_path, fifteens_path[-1].get_path())
+        self.assertEqual(fifteens_path[-1].g, 9)
+
+    def test_bucket_a_star_algorithm(self):
+        """Test that A* with the bucketed open list finds a solution of the same length as A*.
+        """
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        fifteens_path = BucketAstar(FifteensNode(input_str=input_str))
+        self.assertEqual(len(fifteens_path), len(Astar(FifteensNode(input_str=input_str))))
+        self.assertTrue(fifteens_path[-1].is_goal())
+
+    def test_predecessor_a_star_algorithm(self):
+        """Test that A* with a predecessor table rebuilds a path in the same format as A*.
+        """
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        fifteens_path = PredecessorAstar(PackedFifteensNode(input_str=input_str))
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertTrue(fifteens_path[-1].is_goal())
+        self.assertEqual(fifteens_path, fifteens_path[-1].get_path())
+        self.assertEqual([n.g for n in fifteens_path], list(range(10)))
+
+    def test_memory_bounded_a_star_algorithm(self):
+        """Test that SMA* stays within its budget and still finds an optimal solution.
+        """
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        stats = SearchStats()
+        fifteens_path = SMAstar(FifteensNode(input_str=input_str), max_nodes=30, stats=stats)
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertTrue(fifteens_path[-1].is_goal())
+        self.assertLessEqual(stats.peak_open, 30 + 3) # 一次扩展的子节点可以暂时超出预算
+        self.assertEqual(len(SMAstar(FifteensNode(input_str=input_str), max_bytes=100000)), 10)
+
+    def test_memory_bounded_a_star_frees_pruned_nodes(self):
+        """Test that the nodes pruned by SMA* are freed, by counting the nodes alive during the search.
+        """
+        class CountedNode(FifteensNode):
+            __slots__ = ()
+            alive = peak = 0
+
+            def __init__(self, *args, **kwargs):
+                super(CountedNode, self).__init__(*args, **kwargs)
+                CountedNode.alive += 1
+                CountedNode.peak = max(CountedNode.peak, CountedNode.alive)
+
+            def __del__(self):
+                CountedNode.alive -= 1
+
+        stats = SearchStats()
+        board = [6, 11, 2, 3, 9, 0, 5, 10, 13, 1, 15, 4, 14, 8, 12, 7]
+        fifteens_path = SMAstar(CountedNode(board=board), max_nodes=1000, stats=stats)
+        self.assertEqual(len(fifteens_path), len(PredecessorAstar(FifteensNode(board=board))))
+        self.assertGreater(stats.pruned, 0)
+        self.assertLessEqual(stats.peak_open, 1000 + 3)
+        self.assertLessEqual(CountedNode.peak, 1000 + 3 + 3) # 加上正在生成的子节点
+
+    def test_beam_search(self):
+        """Test that beam search returns a valid path to the goal in the same format as A*.
+        """
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        fifteens_path = BeamSearch(FifteensNode(input_str=input_str), width=8)
+        self.assertTrue(fifteens_path[-1].is_goal())
+        self.assertEqual(fifteens_path, fifteens_path[-1].get_path())
+        self.assertEqual(BeamSearch(FifteensNode(input_str=input_str), width=8, max_depth=3), [])
+
+    def test_parallel_a_star_algorithm(self):
+        """Test that hash-distributed parallel A* returns a path in the same format as A*.
+        """
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        fifteens_path = ParallelAstar(FifteensNode(input_str=input_str), processes=2)
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertTrue(fifteens_path[-1].is_goal())
+        self.assertEqual(fifteens_path, fifteens_path[-1].get_path())
+
+
+class TestSlidingTile(unittest.TestCase):
+    def test_slotted_nodes(self):
+        """Test that the nodes of every problem use __slots__ and carry no __dict__."""
+        roots = [FifteensNode(input_str='5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'),
+                 PackedFifteensNode(board=list(tile_tables(16).goal)), SlidingTileNode(board=list(tile_tables(9).goal)),
+                 SuperqueensNode(n=5), PatternDatabaseNode(board=list(tile_tables(16).goal)),
+                 PerimeterNode(board=list(tile_tables(16).goal))]
+        for root in roots:
+            for node in [root] + root.generate_children():
+                self.assertFalse(hasattr(node, '__dict__'), type(node).__name__)
+
+    def test_tables(self):
+        """Test that the tables of every size are built once and hold the legal moves and the goal."""
+        tables = tile_tables(9)
+        self.assertIs(tables, tile_tables(9))
+        self.assertEqual(tables.goal, (1, 2, 3, 4, 5, 6, 7, 8, 0))
+        self.assertEqual([len(m) for m in tables.moves], [2, 3, 2, 3, 4, 3, 2, 3, 2])
+        self.assertEqual(sorted(tile_tables(25).moves[24]), [19, 23])
+        self.assertRaises(ValueError, tile_tables, 10)
+
+    def test_eight_puzzle(self):
+        """Test that A* solves an 8 puzzle optimally and the moves describe the path."""
+        eights_root = SlidingTileNode(input_str='4 3 8\n2 0 5\n7 1 6')
+        eights_path = Astar(eights_root)
+        self.assertEqual(len(eights_path), 17)
+        self.assertEqual(len(IDAstar(SlidingTileNode(input_str='4 3 8\n2 0 5\n7 1 6'))), 17)
+        self.assertTrue(eights_path[-1].is_goal())
+        self.assertEqual(str(eights_root), '  4  3  8\n  2     5\n  7  1  6\n')
+
+    def test_twenty_four_puzzle(self):
+        """Test that a 24 puzzle board is expanded and solved with the tables of its size."""
+        input_str = '1 2 3 4 5\n6 7 8 9 10\n11 12 13 14 0\n16 17 18 19 15\n21 22 23 24 20'
+        twenty_fours_root = SlidingTileNode(input_str=input_str)
+        self.assertEqual(len(twenty_fours_root.generate_children()), 3)
+        twenty_fours_path = Astar(twenty_fours_root)
+        self.assertEqual([node.get_move() for node in twenty_fours_path[1:]], ['D', 'D'])
+
+    def test_fifteens_size(self):
+        """Test that a FifteensNode rejects boards that are not 4x4."""
+        self.assertRaises(ValueError, FifteensNode, input_str='1 2 3\n4 0 5\n7 8 6')
+
 
 class TestSuperqueens(unittest.TestCase):
     def test_constucting_instances(self):
@@ -75,6 +308,15 @@ class TestSuperqueens(unittest.TestCase):
         superqueens_root = SuperqueensNode(n=7)
         superqueens_root.generate_children()
 
+    def test_successors(self):
+        """Test that the successors carry the state, the cost and the new queen of every child.
+        """
+        superqueens_node = SuperqueensNode(n=5, queen_positions=((0, 0), (1, 2)))
+        successors = list(superqueens_node.successors())
+        childrens = superqueens_node.generate_children()
+        self.assertEqual([(c.state, c.g - superqueens_node.g, c.get_move()) for c in childrens], successors)
+        self.assertEqual(list(SuperqueensNode(n=2, queen_positions=((0, 0), (1, 1))).successors()), [])
+
     def test_heuristic_functions(self):
         """Test that evaluate_heuristic returns without raising an error.
         """
@@ -90,6 +332,608 @@ class TestSuperqueens(unittest.TestCase):
         self.assertEqual(len(superqueens_path[0].queen_positions), 0)
         self.assertTrue(superqueens_path[-1].is_goal())
 
+    def test_ida_star_algorithm(self):
+        """Test that IDA* finds a goal state with the same cost as A* when the board size is 7."""
+        superqueens_root = SuperqueensNode(n=7)
+        superqueens_path = IDAstar(superqueens_root)
+        self.assertEqual(len(superqueens_path), 8)
+        self.assertTrue(superqueens_path[-1].is_goal())
+        self.assertEqual(superqueens_path[-1].g, Astar(SuperqueensNode(n=7))[-1].g)
+
+    def test_bucket_a_star_algorithm(self):
+        """Test that A* with the bucketed open list finds a goal state with the minimum number of conflicts."""
+        for n in range(4, 8):
+            superqueens_path = BucketAstar(SuperqueensNode(n=n))
+            self.assertEqual(len(superqueens_path), n + 1)
+            self.assertTrue(superqueens_path[-1].is_goal())
+            self.assertEqual(superqueens_path[-1].g, IDAstar(SuperqueensNode(n=n))[-1].g)
+
+    def test_anytime_a_star_algorithm(self):
+        """Test that anytime A* reports cheaper solutions with tighter bounds and ends with an optimal one."""
+        reported = []
+        solutions = AnytimeAstar(SuperqueensNode(n=7), weight=2.0,
+                                 on_solution=lambda path, bound: reported.append(bound))
+        self.assertEqual([bound for _, bound in solutions], reported)
+        self.assertEqual(solutions[-1][1], 1)
+        self.assertEqual(solutions[-1][0][-1].g, BucketAstar(SuperqueensNode(n=7))[-1].g)
+        costs = [path[-1].g for path, _ in solutions]
+        self.assertEqual(costs, sorted(costs))
+        for path, bound in solutions:
+            self.assertTrue(path[-1].is_goal())
+            self.assertGreaterEqual(bound, 1)
+
+    def test_predecessor_a_star_algorithm(self):
+        """Test that A* with a predecessor table finds a goal state with the minimum number of conflicts."""
+        superqueens_path = PredecessorAstar(SuperqueensNode(n=7))
+        self.assertEqual(len(superqueens_path), 8)
+        self.assertTrue(superqueens_path[-1].is_goal())
+        self.assertEqual(superqueens_path[-1].g, BucketAstar(SuperqueensNode(n=7))[-1].g)
+
+    def test_memory_bounded_a_star_algorithm(self):
+        """Test that SMA* prunes nodes to stay within a small budget and finds the optimal cost.
+        """
+        stats = SearchStats()
+        superqueens_path = SMAstar(SuperqueensNode(n=7), max_nodes=50, stats=stats)
+        self.assertEqual(len(superqueens_path), 8)
+        self.assertEqual(superqueens_path[-1].g, PredecessorAstar(SuperqueensNode(n=7))[-1].g)
+        self.assertLessEqual(stats.peak_open, 50 + 7)
+        self.assertGreater(stats.pruned, 0)
+
+    def test_beam_search(self):
+        """Test that beam search with a narrow beam and a small table still places all the queens."""
+        superqueens_path = BeamSearch(SuperqueensNode(n=7), width=3, max_seen=50)
+        self.assertEqual(len(superqueens_path), 8)
+        self.assertTrue(superqueens_path[-1].is_goal())
+
+    def test_anytime_a_star_budget(self):
+        """Test that anytime A* stops when its expansion budget runs out."""
+        stats = SearchStats()
+        AnytimeAstar(SuperqueensNode(n=7), max_expansions=10, stats=stats)
+        self.assertLessEqual(stats.expanded, 10)
+        self.assertEqual(AnytimeAstar(SuperqueensNode(n=7), max_expansions=0), [])
+
+    def test_parallel_a_star_algorithm(self):
+        """Test that hash-distributed parallel A* finds a goal state with the minimum number of conflicts."""
+        superqueens_path = ParallelAstar(SuperqueensNode(n=7), processes=2)
+        self.assertEqual(len(superqueens_path), 8)
+        self.assertTrue(superqueens_path[-1].is_goal())
+        self.assertEqual(superqueens_path[-1].g, BucketAstar(SuperqueensNode(n=7))[-1].g)
+
+
+class TestBucketQueue(unittest.TestCase):
+    def test_pop_order(self):
+        """Test that nodes are popped by lowest f, then highest g, then last in first out."""
+        nodes = [SuperqueensNode(g=g, n=4) for g in (2, 1, 3, 1, 2)]
+        queue = BucketQueue()
+        for node in nodes:
+            queue.push(node)
+        self.assertEqual(len(queue), 5)
+        self.assertEqual(queue.peek_f(), 1)
+        popped = [queue.pop() for _ in range(5)]
+        self.assertEqual(popped, [nodes[3], nodes[1], nodes[4], nodes[0], nodes[2]])
+        self.assertRaises(IndexError, queue.pop)
+
+
+class TestStateSet(unittest.TestCase):
+    def test_set_operations(self):
+        """Test that a StateSet behaves like a set while it grows and shrinks."""
+        states = StateSet(capacity=4)
+        reference = set()
+        for i in range(1, 3000):
+            key = (i * 0x2545F4914F6CDD1D) & ((1 << 64) - 1)
+            states.add(key)
+            reference.add(key)
+            if i % 3 == 0:
+                old = ((i // 2) * 0x2545F4914F6CDD1D) & ((1 << 64) - 1)
+                states.discard(old)
+                reference.discard(old)
+        self.assertEqual(len(states), len(reference))
+        self.assertEqual(set(states), reference)
+        self.assertTrue(all(key in states for key in reference))
+        self.assertNotIn(12345, states)
+        self.assertRaises(KeyError, states.remove, 12345)
+        self.assertRaises(ValueError, states.add, 0)
+
+    def test_batch_operations(self):
+        """Test that the batch operations agree with the operations on one state at a time."""
+        keys = np.array([(i * 0x2545F4914F6CDD1D) & ((1 << 64) - 1) for i in range(1, 2000)], dtype=np.uint64)
+        states = StateSet(capacity=4)
+        states.update(keys[::2])
+        states.update(keys[:10])
+        reference = set(keys[::2].tolist()) | set(keys[:10].tolist())
+        self.assertEqual(set(states), reference)
+        self.assertEqual(len(states), len(reference))
+        self.assertEqual(states.contains(keys).tolist(), [key in reference for key in keys.tolist()])
+        self.assertFalse(states.contains(np.array([0], dtype=np.uint64))[0])
+        self.assertRaises(ValueError, states.update, [0, 1])
+
+
+class TestBatchAstar(unittest.TestCase):
+    def test_heuristic(self):
+        """Test that the batched heuristic and expansion agree with the nodes."""
+        fifteens_root = FifteensNode(input_str='5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12')
+        problem = batch_problem(fifteens_root)
+        self.assertIsInstance(problem, SlidingTileBatch)
+        nodes = [fifteens_root]
+        for _ in range(3):
+            nodes += [c for n in nodes for c in n.generate_children()]
+        keys = np.array([pack_board(n.board) for n in nodes], dtype=np.uint64)
+        boards = problem.decode(keys)
+        self.assertEqual(problem.heuristic(boards).tolist(), [n.f - n.g for n in nodes])
+        parents, child_keys, child_boards, costs = problem.expand(keys[:1], boards[:1])
+        self.assertEqual(sorted(child_keys.tolist()),
+                         sorted(pack_board(c.board) for c in fifteens_root.generate_children()))
+        self.assertEqual(child_boards.tolist(), problem.decode(child_keys).tolist())
+        self.assertRaises(TypeError, batch_problem, SuperqueensNode(n=4))
+        self.assertRaises(TypeError, batch_problem, PatternDatabaseNode(board=fifteens_root.board))
+
+    def test_a_star_algorithm(self):
+        """Test that batched A* finds solutions as short as A* does."""
+        fifteens_path = BatchAstar(FifteensNode(input_str='5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'),
+                                   batch_size=4)
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertTrue(fifteens_path[-1].is_goal())
+        self.assertEqual(len(BatchAstar(SlidingTileNode(input_str='4 3 8\n2 0 5\n7 1 6'))), 17)
+        stats = SearchStats()
+        self.assertEqual(len(BatchAstar(FifteensNode(input_str='1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 15 0'),
+                                        stats=stats)), 1)
+        self.assertEqual(stats.expanded, 0)
+
+
+class TestExternalAstar(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_a_star_algorithm(self):
+        """Test that external A* finds optimal solutions and leaves its closed buckets on disk."""
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        stats = SearchStats()
+        fifteens_path = ExternalAstar(PackedFifteensNode(input_str=input_str), directory=self.directory,
+                                      chunk_size=3, stats=stats)
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertTrue(fifteens_path[-1].is_goal())
+        self.assertEqual(stats.peak_closed, stats.expanded + 1)
+        self.assertTrue(all(name.endswith(('.open', '.closed')) for name in os.listdir(self.directory)))
+        self.assertIn('0-9.closed', os.listdir(self.directory))
+        self.assertEqual(len(ExternalAstar(SlidingTileNode(input_str='4 3 8\n2 0 5\n7 1 6'))), 17)
+        self.assertEqual(len(ExternalAstar(FifteensNode(input_str='1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 15 0'))), 1)
+
+
+class TestAsyncSearch(unittest.TestCase):
+    easy = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+    hard = '15 14  8 12\n10 11  9 13\n2  6  5  1\n3  7  4  0'
+
+    def test_solve_async(self):
+        """Test that A* in slices on the event loop reports its progress and gives the solution of A*."""
+        events = []
+        fifteens_path = asyncio.run(solve_async(FifteensNode(input_str=self.easy), on_progress=events.append,
+                                                slice_size=2))
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertGreater(len(events), 0)
+        self.assertEqual([e.f_bound for e in events], sorted(e.f_bound for e in events))
+        self.assertRaises(asyncio.TimeoutError, asyncio.run,
+                          solve_async(FifteensNode(input_str=self.hard), timeout=0.2))
+
+    def test_slices_follow_astar(self):
+        """Test that A* in slices expands the same nodes as `Astar` and fills the same counters."""
+        board = [5, 1, 2, 4, 10, 3, 8, 0, 13, 7, 11, 12, 6, 9, 14, 15]
+        stats, sliced_stats = SearchStats(), SearchStats()
+        fifteens_path = Astar(FifteensNode(board=board), stats=stats)
+        events = []
+        sliced_path = asyncio.run(solve_async(FifteensNode(board=board), on_progress=events.append, slice_size=7,
+                                              stats=sliced_stats))
+        self.assertEqual([n.board for n in sliced_path], [n.board for n in fifteens_path])
+        for counter in ('expanded', 'generated', 'duplicates', 'peak_open'):
+            self.assertEqual(getattr(sliced_stats, counter), getattr(stats, counter))
+        self.assertEqual([e.expanded for e in events], list(range(7, stats.expanded + 1, 7)))
+        self.assertGreater(sliced_stats.elapsed, 0)
+        self.assertGreater(sliced_stats.expansions_per_second, 0)
+        self.assertGreater(sliced_stats.peak_memory, 0)
+
+    def test_search_pool(self):
+        """Test that concurrent searches share a bounded pool and that a timed out search does not block the others."""
+        async def requests():
+            events = []
+
+            async def on_progress(progress):
+                events.append(progress)
+            async with SearchPool(max_workers=1, slice_size=5) as pool:
+                hard = asyncio.ensure_future(pool.solve(FifteensNode(input_str=self.hard), timeout=0.5))
+                paths = await asyncio.gather(*[pool.solve(FifteensNode(input_str=self.easy), on_progress=on_progress)
+                                               for _ in range(3)])
+                with self.assertRaises(asyncio.TimeoutError):
+                    await hard
+                paths.append(await pool.solve(SuperqueensNode(n=7)))
+            return paths, events
+        paths, events = asyncio.run(requests())
+        self.assertEqual([len(p) for p in paths], [10, 10, 10, 8])
+        self.assertGreater(len(events), 0)
+
+
+class TestPatternDatabase(unittest.TestCase):
+    groups = ((1, 2), (3, 4), (5, 6), (7, 8), (9, 10), (11, 12), (13, 14), (15,))
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        build_all(self.directory, self.groups)
+        self.database = PatternDatabase(self.directory, self.groups)
+
+    def tearDown(self):
+        PatternDatabaseNode.database = None
+        self.database.close()
+        shutil.rmtree(self.directory)
+
+    def test_ranking(self):
+        """Test that every placement of tiles has its own index."""
+        for k in (1, 2, 3):
+            self.assertEqual([rank(unrank(r, k)) for r in range(table_size(k))], list(range(table_size(k))))
+
+    def test_group_size_limit(self):
+        """Test that groups too large to build are refused before any table is written."""
+        directory = os.path.join(self.directory, 'large')
+        self.assertRaises(ValueError, build_all, directory, ((1, 2), tuple(range(3, 11))))
+        self.assertFalse(os.path.exists(directory))
+
+    def test_heuristic(self):
+        """Test that the database is 0 at the goal and never exceeds the optimal number of moves."""
+        final_str = "1  2  3  4\n5  6  7  8\n9 10 11 12\n13 14 15  0"
+        self.assertEqual(self.database.heuristic(FifteensNode(input_str=final_str).board), 0)
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        fifteens_path = Astar(FifteensNode(input_str=input_str))
+        for node in fifteens_path:
+            self.assertLessEqual(self.database.heuristic(node.board), fifteens_path[-1].g - node.g)
+
+    def test_a_star_algorithm(self):
+        """Test that A* with the pattern database heuristic finds an optimal solution."""
+        PatternDatabaseNode.database = self.database
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        fifteens_path = Astar(PatternDatabaseNode(input_str=input_str))
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertTrue(fifteens_path[-1].is_goal())
+
+
+class TestSolver(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SolutionCache(os.path.join(self.directory, 'solutions.sqlite'))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_solvability(self):
+        """Test that boards reached from the goal are solvable and swapping two tiles makes them unsolvable."""
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        board = FifteensNode(input_str=input_str).board
+        self.assertTrue(is_solvable(board))
+        swapped = (board[1], board[0]) + board[2:]
+        self.assertFalse(is_solvable(swapped))
+        self.assertEqual(solve(FifteensNode(board=swapped), engine=None), [])
+        self.assertRaises(ValueError, is_solvable, (1,) * 16)
+
+    def test_reflection(self):
+        """Test that the goal is its own mirror image and a board and its mirror image share one canonical form."""
+        final_str = "1  2  3  4\n5  6  7  8\n9 10 11 12\n13 14 15  0"
+        goal = FifteensNode(input_str=final_str).board
+        self.assertEqual(reflect(goal), goal)
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        board = FifteensNode(input_str=input_str).board
+        self.assertEqual(reflect(reflect(board)), board)
+        self.assertEqual(canonicalize(board)[0], canonicalize(reflect(board))[0])
+
+    def test_cache(self):
+        """Test that a board and its mirror image are answered from the cache without searching."""
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        fifteens_path = solve(FifteensNode(input_str=input_str), cache=self.cache)
+        self.assertEqual(len(self.cache), 1)
+
+        def no_search(root, **kwargs):
+            raise AssertionError('the solution should come from the cache')
+        cached_path = solve(FifteensNode(input_str=input_str), engine=no_search, cache=self.cache)
+        self.assertEqual([n.board for n in cached_path], [n.board for n in fifteens_path])
+        mirror_path = solve(FifteensNode(board=reflect(fifteens_path[0].board)), engine=no_search, cache=self.cache)
+        self.assertEqual(len(mirror_path), len(fifteens_path))
+        self.assertTrue(mirror_path[-1].is_goal())
+
+    def test_cache_optimality(self):
+        """Test that an optimal engine is not answered with a cached solution of a non-optimal one."""
+        board = [5, 1, 2, 4, 10, 3, 8, 0, 13, 7, 11, 12, 6, 9, 14, 15]
+        beam_path = solve(FifteensNode(board=board), engine=lambda root, **kwargs: BeamSearch(root, width=2), cache=self.cache)
+        self.assertGreater(len(beam_path) - 1, 20)
+        self.assertEqual(len(solve(FifteensNode(board=board), cache=self.cache)), len(beam_path))
+        optimal_path = solve(FifteensNode(board=board), engine=BucketAstar, cache=self.cache)
+        self.assertEqual(len(optimal_path) - 1, 20)
+
+        def no_search(root, **kwargs):
+            raise AssertionError('the solution should come from the cache')
+        self.assertEqual(len(solve(FifteensNode(board=board), engine=no_search, optimal=True, cache=self.cache)), 21)
+        self.cache.put(canonicalize(board)[0], [], optimal=False) # 不会替换最优解
+        self.assertEqual(len(self.cache.get(canonicalize(board)[0], optimal=True)), 20)
+
+
+class TestSearchStats(unittest.TestCase):
+    def test_counters(self):
+        """Test that the counters of a search agree with the hooks and with the solution."""
+        expansions = []
+        progress = []
+        stats = SearchStats(on_expand=lambda node, children: expansions.append(len(children)),
+                            on_progress=lambda s: progress.append(s.expanded), progress_every=100)
+        superqueens_path = Astar(SuperqueensNode(n=7), stats=stats)
+        self.assertEqual(len(superqueens_path), 8)
+        self.assertEqual(stats.expanded, len(expansions))
+        self.assertEqual(stats.generated, sum(expansions))
+        self.assertEqual(progress, list(range(100, stats.expanded + 1, 100)))
+        self.assertGreater(stats.peak_open, 0)
+        self.assertEqual(stats.peak_closed, stats.expanded)
+        self.assertGreater(stats.elapsed, 0)
+        self.assertGreater(stats.expansions_per_second, 0)
+        self.assertGreater(stats.peak_memory, 0)
+
+    def test_deferred_construction(self):
+        """Test that A* only constructs the successors whose state is new."""
+        constructed = []
+        make_child = FifteensNode.make_child
+
+        def counting_make_child(node, *successor):
+            constructed.append(successor[0])
+            return make_child(node, *successor)
+        FifteensNode.make_child = counting_make_child
+        try:
+            stats = SearchStats()
+            fifteens_path = Astar(FifteensNode(input_str='5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'),
+                                  stats=stats)
+        finally:
+            FifteensNode.make_child = make_child
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertEqual(len(constructed), len(set(constructed)))
+        self.assertEqual(len(constructed), stats.generated - stats.duplicates)
+
+    def test_timers(self):
+        """Test that the phases are timed and the heuristic is restored after the search."""
+        heuristic = FifteensNode.evaluate_heuristic
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        stats = SearchStats(timing=True)
+        BucketAstar(FifteensNode(input_str=input_str), stats=stats)
+        self.assertIs(FifteensNode.evaluate_heuristic, heuristic)
+        self.assertGreater(stats.timers['generate'], 0)
+        self.assertGreater(stats.timers['heuristic'], 0)
+        self.assertIn('timers', stats.as_dict())
+        for engine in (Astar, BucketAstar, PredecessorAstar): # 各阶段互不重叠, 加起来等于总时间
+            stats = SearchStats(timing=True)
+            engine(FifteensNode(board=[5, 1, 2, 4, 10, 3, 8, 0, 13, 7, 11, 12, 6, 9, 14, 15]), stats=stats)
+            self.assertGreater(stats.timers['queue'], 0)
+            self.assertAlmostEqual(sum(stats.timers.values()), stats.elapsed, delta=0.01 * stats.elapsed)
+
+
+class TestBatch(unittest.TestCase):
+    def test_solve_instance(self):
+        """Test that a solved instance reports its length, moves and counters."""
+        instance = {'id': 'a', 'problem': 'fifteens', 'board': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 0, 11, 13, 14, 15, 12]}
+        result = solve_instance(instance, 'idastar')
+        self.assertEqual(result['id'], 'a')
+        self.assertTrue(result['solved'])
+        self.assertEqual(result['length'], 2)
+        self.assertEqual(result['moves'], ['R', 'D'])
+        self.assertGreater(result['expanded'], 0)
+        self.assertIn('time', result)
+
+    def test_solve_instance_error(self):
+        """Test that an invalid instance or a search that raises reports an error instead of raising."""
+        result = solve_instance({'id': 'b', 'problem': 'cube'})
+        self.assertIn('error', result)
+        with mock.patch('batch.solve', side_effect=RecursionError('maximum recursion depth exceeded')):
+            result = solve_instance({'id': 'c', 'problem': 'superqueens', 'n': 4}, 'idastar')
+        self.assertEqual(result['error'], 'RecursionError: maximum recursion depth exceeded')
+
+    def test_solve_batch(self):
+        """Test that every instance of a batch gets one result."""
+        instances = [{'problem': 'superqueens', 'n': n} for n in range(4, 7)]
+        results = sorted(solve_batch(instances, processes=2), key=lambda r: r['id'])
+        self.assertEqual([r['id'] for r in results], [0, 1, 2])
+        self.assertEqual([r['length'] for r in results], [4, 5, 6])
+
+    def test_solve_batch_bad_lines(self):
+        """Test that unparsable lines and lines that are not objects get error results without stopping the batch."""
+        lines = ['{"problem": "superqueens", "n": 4}\n', 'not json\n', '\n', '[1, 2]\n', '{"problem": "superqueens", "n": 5}\n']
+        results = sorted(solve_batch(read_instances(lines), processes=2), key=lambda r: r['id'])
+        self.assertEqual([r['id'] for r in results], [0, 1, 2, 3])
+        self.assertEqual([r.get('length') for r in results], [4, None, None, 5])
+        self.assertIn('line 2', results[1]['error'])
+        self.assertIn('JSON object', results[2]['error'])
+        self.assertIn('error', solve_instance([1, 2]))
+
+    def test_solve_batch_cache(self):
+        """Test that repeated boards are answered from the cache and unsolvable boards are rejected."""
+        directory = tempfile.mkdtemp()
+        cache = os.path.join(directory, 'solutions.sqlite')
+        board = [5, 1, 2, 4, 9, 6, 3, 8, 13, 10, 7, 11, 0, 14, 15, 12]
+        unsolvable = [1, 5, 2, 4, 9, 6, 3, 8, 13, 10, 7, 11, 0, 14, 15, 12]
+        try:
+            first = list(solve_batch([{'board': board}], processes=1, cache=cache))
+            results = sorted(solve_batch([{'board': board}, {'board': unsolvable}], processes=1, cache=cache),
+                             key=lambda r: r['id'])
+        finally:
+            shutil.rmtree(directory)
+        self.assertGreater(first[0]['expanded'], 0)
+        self.assertEqual(results[0]['moves'], first[0]['moves'])
+        self.assertEqual(results[0]['expanded'], 0)
+        self.assertFalse(results[1]['solved'])
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_instances(self):
+        """Test that the instances are reproducible and no deeper than their random walk."""
+        instances = fifteens_instances([8, 12], 2, seed=1)
+        self.assertEqual(instances, fifteens_instances([8, 12], 2, seed=1))
+        self.assertNotEqual(instances, fifteens_instances([8, 12], 2, seed=2))
+        for instance in instances:
+            self.assertLessEqual(len(Astar(FifteensNode(board=instance['board']))) - 1, instance['walk'])
+
+    def test_run_and_compare(self):
+        """Test that the suite runs every configuration and that the comparison flags regressions."""
+        instances = fifteens_instances([6], 1) + superqueens_instances([5])
+        results = list(run_suite(instances, ['astar', 'batch']))
+        self.assertEqual([r['config'] for r in results], ['astar/manhattan-lc', 'batch/manhattan-lc', 'astar/zero'])
+        self.assertTrue(all(r['solved'] and r['peak_memory'] > 0 for r in results))
+        baseline = {'results': results}
+        self.assertEqual(compare(baseline, baseline), [])
+        worse = [dict(r, expanded=r['expanded'] * 2 + 1) for r in results[:1]]
+        self.assertEqual([r['metric'] for r in compare(baseline, {'results': worse})], ['expanded'])
+
+    def test_peak_memory_of_run(self):
+        """Test that the peak memory of a run does not include the memory of the process running the suite."""
+        baseline = next(run_suite(fifteens_instances([4], 1), ['astar']))['peak_memory']
+        ballast = b'x' * (48 << 20)
+        result = next(run_suite(fifteens_instances([4], 1), ['astar']))
+        del ballast
+        self.assertLess(result['peak_memory'], baseline + (24 << 20))
+
+    def test_sliding_tile_engines_skip_other_heuristics(self):
+        """Test that the batched engines, which compute their own heuristic, do not run under the pdb label."""
+        results = list(run_suite(fifteens_instances([4], 1), ['batch', 'external'], ['manhattan-lc', 'pdb']))
+        self.assertEqual([r['config'] for r in results], ['batch/manhattan-lc', 'external/manhattan-lc'])
+
+
+class TestPortfolio(unittest.TestCase):
+    def test_first_optimal(self):
+        """Test that the portfolio returns an optimal solution built from the given root."""
+        fifteens_root = FifteensNode(input_str='5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12')
+        fifteens_path, winner = solve_portfolio(fifteens_root)
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertIs(fifteens_path[0], fifteens_root)
+        self.assertIn(winner, ('bucket', 'batch', 'idastar', 'anytime', 'anytime/w8'))
+        superqueens_path, _ = solve_portfolio(SuperqueensNode(n=7))
+        self.assertEqual(superqueens_path[-1].g, PredecessorAstar(SuperqueensNode(n=7))[-1].g)
+
+    def test_default_portfolio_is_optimal(self):
+        """Test that the default portfolio returns an optimal path on an instance where `Astar` does not."""
+        board = [5, 1, 2, 4, 10, 3, 8, 0, 13, 7, 11, 12, 6, 9, 14, 15]
+        self.assertEqual(len(Astar(FifteensNode(board=board))) - 1, 22)
+        fifteens_path, _ = solve_portfolio(FifteensNode(board=board))
+        self.assertEqual(len(fifteens_path) - 1, 20)
+
+    def test_optimal_default(self):
+        """Test that only the engines of `OPTIMAL_ENGINES` are trusted as optimal unless told otherwise."""
+        board = [5, 1, 2, 4, 10, 3, 8, 0, 13, 7, 11, 12, 6, 9, 14, 15]
+        self.assertFalse(Configuration('astar', Astar).optimal)
+        self.assertTrue(Configuration('bucket', BucketAstar).optimal)
+        self.assertTrue(Configuration('astar', Astar, optimal=True).optimal)
+        configs = [Configuration('astar', Astar), Configuration('bucket', BucketAstar)]
+        fifteens_path, _ = solve_portfolio(FifteensNode(board=board), configs)
+        self.assertEqual(len(fifteens_path) - 1, 20)
+
+    def test_dead_worker(self):
+        """Test that a worker killed without reporting counts as finished instead of blocking the race."""
+        def killed(root, **kwargs):
+            os.kill(os.getpid(), signal.SIGKILL)
+        configs = [Configuration('killed', killed), Configuration('unsolved', lambda root, **kwargs: [])]
+        start = time.perf_counter()
+        self.assertEqual(solve_portfolio(SuperqueensNode(n=5), configs), ([], None))
+        self.assertLess(time.perf_counter() - start, 5)
+
+    def test_deadline(self):
+        """Test that the best solution found before the deadline is returned when no optimal one is."""
+        fifteens_root = FifteensNode(board=[1, 9, 6, 10, 4, 11, 12, 0, 2, 7, 8, 13, 15, 5, 14, 3])
+        configs = [Configuration('astar', Astar), Configuration('anytime', AnytimeAstar, anytime=True, weight=5)]
+        start = time.perf_counter()
+        fifteens_path, winner = solve_portfolio(fifteens_root, configs, deadline=1.0)
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(winner, 'anytime')
+        self.assertTrue(fifteens_path[-1].is_goal())
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def interrupted(self, root, expansions, interval=0):
+        """Runs a checkpointed search that checkpoints every `interval` seconds and is stopped after `expansions`."""
+        def on_expand(node, children):
+            if stats.expanded >= expansions:
+                raise KeyboardInterrupt
+        stats = SearchStats(on_expand=on_expand)
+        with self.assertRaises(KeyboardInterrupt):
+            CheckpointedAstar(root, self.directory, interval=interval, stats=stats)
+
+    def test_resume(self):
+        """Test that a stopped search resumes from its checkpoint and still finds an optimal solution."""
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        self.interrupted(PackedFifteensNode(input_str=input_str), 5)
+        stats = SearchStats()
+        fifteens_path = CheckpointedAstar(PackedFifteensNode(input_str=input_str), self.directory, stats=stats)
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertTrue(fifteens_path[-1].is_goal())
+        self.assertGreaterEqual(stats.expanded, 4)
+        self.assertRaises(ValueError, CheckpointedAstar, FifteensNode(input_str=input_str), self.directory)
+        self.assertEqual(len(CheckpointedAstar(FifteensNode(input_str=input_str), self.directory, resume=False)), 10)
+
+    def test_final_checkpoint(self):
+        """Test that a search stopped before its first timed checkpoint still saves its complete expansions."""
+        self.interrupted(SuperqueensNode(n=7), 50, interval=3600)
+        with open(os.path.join(self.directory, 'checkpoint.json')) as f:
+            header = json.load(f)
+        self.assertEqual(header['closed'][0], 49) # 被打断的第 50 次扩展不算
+        self.assertEqual(header['expanded'], 49)
+        stats = SearchStats()
+        superqueens_path = CheckpointedAstar(SuperqueensNode(n=7), self.directory, stats=stats)
+        self.assertEqual(superqueens_path[-1].g, PredecessorAstar(SuperqueensNode(n=7))[-1].g)
+        self.assertGreaterEqual(stats.expanded, 49)
+
+    def test_writer_error(self):
+        """Test that a checkpoint that cannot be written stops the search with its error."""
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        with mock.patch('os.replace', side_effect=OSError(errno.ENOSPC, 'No space left on device')):
+            with self.assertRaises(OSError):
+                CheckpointedAstar(FifteensNode(input_str=input_str), self.directory, interval=0)
+
+    def test_resume_superqueens(self):
+        """Test that a Superqueens search resumes with the same optimal cost."""
+        self.interrupted(SuperqueensNode(n=7), 50)
+        superqueens_path = CheckpointedAstar(SuperqueensNode(n=7), self.directory)
+        self.assertEqual(len(superqueens_path), 8)
+        self.assertEqual(superqueens_path[-1].g, PredecessorAstar(SuperqueensNode(n=7))[-1].g)
+
+
+class TestPerimeter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        path = os.path.join(self.directory, 'perimeter-6.bin')
+        keys, distances = build_perimeter(6)
+        write_perimeter(path, keys, distances)
+        PerimeterNode.perimeter = Perimeter(path)
+
+    def tearDown(self):
+        PerimeterNode.perimeter = None
+        shutil.rmtree(self.directory)
+
+    def test_table(self):
+        """Test that the table holds every state within its depth with its exact distance."""
+        perimeter = PerimeterNode.perimeter
+        self.assertEqual(len(perimeter), 1 + 2 + 4 + 10 + 24 + 54 + 107)
+        self.assertEqual(perimeter.depth, 6)
+        self.assertEqual(perimeter.distance(tile_tables(16).goal), 0)
+        self.assertEqual(perimeter.distance(FifteensNode(input_str='1 2 3 4\n5 6 7 8\n9 10 0 11\n13 14 15 12').board), 2)
+        self.assertIsNone(perimeter.distance(FifteensNode(input_str='5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12').board))
+
+    def test_a_star_algorithm(self):
+        """Test that perimeter search stops at the perimeter and completes an optimal path from the table."""
+        input_str = '5  1  2  4\n9  6  3  8\n13 10  7 11\n0 14 15 12'
+        perimeter_root = PerimeterNode(input_str=input_str)
+        self.assertGreaterEqual(perimeter_root.f, 7)
+        stats = SearchStats()
+        fifteens_path = PerimeterAstar(perimeter_root, stats=stats)
+        self.assertEqual(len(fifteens_path), 10)
+        self.assertTrue(fifteens_path[-1].is_goal())
+        self.assertEqual([node.exact for node in fifteens_path[3:]], list(range(6, -1, -1)))
+        self.assertLessEqual(stats.expanded, 3)
+        self.assertEqual(len(PerimeterAstar(PerimeterNode(input_str='1 2 3 4\n5 6 7 8\n9 10 0 11\n13 14 15 12'))), 3)
+
 
 if __name__ == '__main__':
     unittest.main()
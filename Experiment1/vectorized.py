@@ -0,0 +1,279 @@
+"""Batched A* over NumPy arrays.
+
+`BatchAstar` does not build a Node per search state. States are kept as 64-bit
+keys, and the open list holds arrays of keys per f value. Every step pops a
+batch of open states of the lowest f value, decodes them into a 2-D array of
+boards, generates all their children with vectorized swaps, and evaluates the
+heuristic of the new children with one gather from a table. The duplicate
+detection is vectorized too: the closed states are kept in a `StateSet`, probed
+for a whole batch of children at once.
+
+The problem-specific part is a "batch problem" object, found in `BATCH_PROBLEMS`
+by the class of the root node (see `SlidingTileBatch` for the interface).
+Other problems plug in by adding their own class to `BATCH_PROBLEMS`.
+
+"""
+import heapq
+
+import numpy as np
+
+from problems import SlidingTileNode, pack_board, tile_tables
+from stateset import StateSet
+from stats import instrumented
+
+
+class SlidingTileBatch:
+    """Vectorized expansion and heuristic of the sliding tile puzzles of up to 16 cells
+    (the 8 and the 15 puzzle), with 64-bit keys packed as in `pack_board`.
+
+    The heuristic is the same as `SlidingTileNode.evaluate_heuristic`: the Manhattan
+    distance, a gather from a [tile, position] table, plus twice the linear conflicts,
+    a gather from a table of the conflicts of every possible content of every line.
+
+    Parameters
+    ----------
+    root : SlidingTileNode
+        The start node. Only the size of its board is used.
+
+    Attributes
+    ----------
+    goal : int
+        The key of the goal board.
+    """
+    def __init__(self, root):
+        cells = len(root.board)
+        if cells > 16:
+            raise ValueError('a board of {} cells does not fit in a 64-bit key'.format(cells))
+        tables = tile_tables(cells)
+        self.size = tables.size
+        self.cells = cells
+        self.goal = pack_board(tables.goal)
+        self.shifts = np.arange(cells, dtype=np.uint64) * np.uint64(4)
+        self.neighbors = np.full((cells, 4), -1, dtype=np.int64) # 空格在每个位置可以移动到的位置, -1 补齐
+        for k, targets in enumerate(tables.moves):
+            self.neighbors[k, :len(targets)] = targets
+        self.manhattan = np.array(tables.manhattan, dtype=np.int64)
+        self.lines = np.array(tables.lines, dtype=np.int64)
+        self.line_shifts = np.arange(self.size, dtype=np.int64) * 4
+        self.conflicts = np.stack([self._line_table(line) for line in range(len(tables.lines))])
+
+    def _line_table(self, line):
+        """Returns the number of conflicts of the given line for every possible content,
+        indexed by the values of its cells packed 4 bits each, as `_line_conflicts` counts them."""
+        size = self.size
+        contents = np.arange(16 ** size, dtype=np.int64)
+        tiles = (contents[:, None] >> self.line_shifts) & 0xF
+        goal = tiles - 1
+        if line < size:
+            in_line = (tiles != 0) & (tiles < self.cells) & (goal // size == line)
+        else:
+            in_line = (tiles != 0) & (tiles < self.cells) & (goal % size == line - size)
+        longest = np.zeros(len(contents), dtype=np.int64) # 已经有序的最长子序列
+        for subset in range(1, 1 << size):
+            members = [k for k in range(size) if subset >> k & 1]
+            valid = in_line[:, members].all(axis=1)
+            for a, b in zip(members, members[1:]):
+                valid &= goal[:, a] < goal[:, b]
+            longest = np.where(valid, np.maximum(longest, len(members)), longest)
+        return (in_line.sum(axis=1) - longest).astype(np.int8)
+
+    def encode(self, node):
+        """Returns the key of a node."""
+        return pack_board(node.board)
+
+    def decode(self, keys):
+        """Returns the boards of an array of keys, one row per key."""
+        return ((keys[:, None] >> self.shifts) & np.uint64(0xF)).astype(np.int64)
+
+    def is_goal(self, keys):
+        """Returns which of an array of keys are goal states."""
+        return keys == np.uint64(self.goal)
+
+    def expand(self, keys, boards):
+        """Generates the children of a batch of states.
+
+        Parameters
+        ----------
+        keys : array of uint64
+            The keys of the states.
+
+        boards : 2-D array
+            Their boards, as returned by `decode`.
+
+        Returns
+        -------
+            parents : array of int
+                For every child, the index of its parent in `keys`.
+
+            child_keys : array of uint64
+                The keys of the children.
+
+            child_boards : 2-D array
+                The boards of the children.
+
+            costs : array of int
+                The cost of the move to every child.
+        """
+        blanks = np.argmin(boards, axis=1)
+        targets = self.neighbors[blanks]
+        parents, slots = np.nonzero(targets >= 0)
+        targets = targets[parents, slots]
+        blanks = blanks[parents]
+        rows = np.arange(len(parents))
+        child_boards = boards[parents]
+        tiles = child_boards[rows, targets]
+        child_boards[rows, blanks] = tiles
+        child_boards[rows, targets] = 0
+        tiles = tiles.astype(np.uint64)
+        child_keys = keys[parents] + (tiles << (blanks.astype(np.uint64) * np.uint64(4))) \
+            - (tiles << (targets.astype(np.uint64) * np.uint64(4)))
+        return parents, child_keys, child_boards, np.ones(len(parents), dtype=np.int64)
+
+    def heuristic(self, boards):
+        """Returns the heuristic of a batch of boards, equal to their `evaluate_heuristic`."""
+        md = self.manhattan[boards, np.arange(self.cells)].sum(axis=1)
+        contents = (boards[:, self.lines] << self.line_shifts).sum(axis=2)
+        lc = self.conflicts[np.arange(len(self.lines)), contents].sum(axis=1)
+        return md + 2 * lc
+
+    def path(self, root, keys):
+        """Returns the path of nodes from the root through the states of the given keys."""
+        path = [root]
+        for key in keys:
+            board = tuple(int(num) for num in self.decode(np.array([key], dtype=np.uint64))[0])
+            path.append(next(c for c in path[-1].generate_children() if c.board == board))
+        return path
+
+
+BATCH_PROBLEMS = {SlidingTileNode: SlidingTileBatch} # 节点类 -> 批量问题类
+
+
+def batch_problem(root):
+    """Returns the batch problem of a root node, from the first of its classes in `BATCH_PROBLEMS`.
+
+    A subclass that overrides `evaluate_heuristic` on the way is refused, since the batch
+    problem would silently search with the heuristic of its base class instead.
+    """
+    classes = type(root).__mro__
+    base = next((cls for cls in classes if cls in BATCH_PROBLEMS), None)
+    if base is None:
+        raise TypeError('no batch problem for {}'.format(type(root).__name__))
+    if any('evaluate_heuristic' in vars(cls) for cls in classes[:classes.index(base)]):
+        raise TypeError('no batch problem for {}: its heuristic is not the one of {}'.format(
+            type(root).__name__, base.__name__))
+    return BATCH_PROBLEMS[base](root)
+
+
+@instrumented
+def BatchAstar(root, batch_size=1024, problem=None, stats=None):
+    """Runs the A* algorithm given the root node, expanding the open states in batches.
+
+    Every step pops up to `batch_size` open states that all have the lowest f value,
+    deepest first. With a consistent heuristic, expanding them in any order within
+    the same f value keeps the solution optimal, so it has the same length as the
+    one of `Astar`. The first copy of a state to be popped then has its lowest cost,
+    so a child is only checked against the closed states: the open list may hold
+    other copies of a state, which are dropped when they are popped.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    batch_size: int, optional
+        The largest number of states expanded at once. Default is 1024.
+
+    problem: object, optional
+        The batch problem, see `SlidingTileBatch`. Default is `batch_problem(root)`.
+
+    stats: SearchStats, optional
+        If given, it is updated with the counters of this search. `on_expand` is not called. Default is None.
+
+    Returns
+    -------
+        path: list of Nodes
+            The solution, a path from the initial node to the goal node.
+            If there is no solution it returns an empty list, like `Astar`.
+    """
+    if problem is None:
+        problem = batch_problem(root)
+    closed = StateSet()
+    parents = {} # 扩展过的键 -> 父状态的键, 根的父状态为 0 (有效的键不为 0)
+    buckets = {} # f -> [(键数组, 代价数组, 父状态键数组), ...]
+    fs = [] # f 值的堆
+    open_size = 1
+    root_keys = np.array([problem.encode(root)], dtype=np.uint64)
+    _push(buckets, fs, root_keys, np.array([root.g], dtype=np.int64), np.zeros(1, dtype=np.uint64),
+          root.g + problem.heuristic(problem.decode(root_keys)))
+    while fs:
+        keys, gs, parent_keys = _pop_batch(buckets, fs, batch_size)
+        open_size -= len(keys)
+        popped = len(keys)
+        keys, first = np.unique(keys, return_index=True) # 同一个 f 值中相同的键代价也相同
+        fresh = ~closed.contains(keys) # 去掉已经扩展过的状态
+        keys, gs, parent_keys = keys[fresh], gs[first][fresh], parent_keys[first][fresh]
+        if stats is not None:
+            stats.duplicates += popped - len(keys)
+        if len(keys) == 0:
+            continue
+        closed.update(keys)
+        parents.update(zip(keys.tolist(), parent_keys.tolist()))
+        goals = np.flatnonzero(problem.is_goal(keys))
+        if len(goals) > 0:
+            return problem.path(root, _trace(parents, int(keys[goals[0]])))
+        parent_index, child_keys, child_boards, costs = problem.expand(keys, problem.decode(keys))
+        child_gs = gs[parent_index] + costs
+        # 同一批中重复的子状态只留代价最小的一个, 再去掉已经扩展过的
+        order = np.lexsort((child_gs, child_keys))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = child_keys[order[1:]] != child_keys[order[:-1]]
+        accepted = order[first]
+        accepted = accepted[~closed.contains(child_keys[accepted])]
+        if stats is not None:
+            stats.expand_batch(len(keys), len(child_keys))
+            stats.duplicates += len(child_keys) - len(accepted)
+            stats.observe(open_size, len(closed))
+        if len(accepted):
+            child_gs = child_gs[accepted]
+            child_fs = child_gs + problem.heuristic(child_boards[accepted])
+            _push(buckets, fs, child_keys[accepted], child_gs, keys[parent_index[accepted]], child_fs)
+            open_size += len(accepted)
+    return []
+
+
+def _push(buckets, fs, keys, gs, parent_keys, f_values):
+    """Adds arrays of keys, their g values and the keys of their parents to the buckets of their f values."""
+    if len(keys) == 1:
+        groups = [(int(f_values[0]), slice(None))]
+    else:
+        groups = [(int(f), f_values == f) for f in np.unique(f_values)]
+    for f, selected in groups:
+        if f not in buckets:
+            buckets[f] = []
+            heapq.heappush(fs, f)
+        buckets[f].append((keys[selected], gs[selected], parent_keys[selected]))
+
+
+def _pop_batch(buckets, fs, batch_size):
+    """Removes and returns up to `batch_size` keys of the lowest f value with their g values
+    and the keys of their parents, deepest first."""
+    f = fs[0]
+    chunks = buckets[f]
+    keys, gs, parent_keys = (np.concatenate([chunk[i] for chunk in chunks]) for i in range(3))
+    if len(keys) <= batch_size:
+        del buckets[f]
+        heapq.heappop(fs)
+        return keys, gs, parent_keys
+    order = np.argsort(-gs, kind='stable')
+    taken, left = order[:batch_size], order[batch_size:]
+    buckets[f] = [(keys[left], gs[left], parent_keys[left])]
+    return keys[taken], gs[taken], parent_keys[taken]
+
+
+def _trace(parents, key):
+    """Returns the keys from the first state after the root to the given state."""
+    keys = []
+    while parents[key] != 0:
+        keys.append(key)
+        key = parents[key]
+    return list(reversed(keys))